@@ -1,9 +1,17 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
-from werkzeug.security import generate_password_hash
+from sqlalchemy import event, func, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
+from flask_jwt_extended import JWTManager, get_jwt_identity, jwt_required
 import os
+import hashlib
+import sqlite3
+import codecs
+import zlib
 from datetime import timedelta, datetime
 import traceback
 
@@ -20,6 +28,42 @@ app.config['SQLALCHEMY_DATABASE_URI'] = db_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string-change-in-production')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+# Account created at startup with the admin flag, which /api/metrics requires
+app.config['ADMIN_EMAIL'] = os.environ.get('ADMIN_EMAIL', 'admin@codecrypt.com')
+# Queue history rows and insert them from a background thread instead of
+# committing inside every encode/decode request
+app.config['HISTORY_WRITE_BEHIND'] = os.environ.get('HISTORY_WRITE_BEHIND', 'false').lower() in ('1','true','yes')
+app.config['HISTORY_QUEUE_SIZE'] = int(os.environ.get('HISTORY_QUEUE_SIZE', 10000))
+app.config['HISTORY_BATCH_SIZE'] = int(os.environ.get('HISTORY_BATCH_SIZE', 200))
+app.config['HISTORY_FLUSH_INTERVAL'] = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 0.5))
+# Cache of cipher results keyed by (cipher, operation, key, text); 0 disables it
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['RESULT_CACHE_ENTRY_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_ENTRY_MAX_BYTES', 1024 * 1024))
+app.config['RESULT_CACHE_TTL'] = float(os.environ.get('RESULT_CACHE_TTL', 0)) or None
+# Texts at least this many characters run in worker processes; 0 disables offloading
+app.config['CIPHER_OFFLOAD_THRESHOLD'] = int(os.environ.get('CIPHER_OFFLOAD_THRESHOLD', 256 * 1024))
+app.config['CIPHER_POOL_WORKERS'] = int(os.environ.get('CIPHER_POOL_WORKERS', 0)) or None
+app.config['CIPHER_POOL_MAX_PENDING'] = int(os.environ.get('CIPHER_POOL_MAX_PENDING', 0)) or None
+app.config['CIPHER_POOL_TIMEOUT'] = float(os.environ.get('CIPHER_POOL_TIMEOUT', 30))
+# Split larger offloaded texts across workers where the cipher allows it; 0 disables
+app.config['CIPHER_POOL_CHUNK_SIZE'] = int(os.environ.get('CIPHER_POOL_CHUNK_SIZE', 256 * 1024))
+# Live-typing sessions: idle seconds before one expires, and how many are kept
+# in total and per user
+app.config['LIVE_SESSION_TTL'] = float(os.environ.get('LIVE_SESSION_TTL', 600))
+app.config['LIVE_SESSION_MAX'] = int(os.environ.get('LIVE_SESSION_MAX', 1000))
+app.config['LIVE_SESSION_MAX_PER_USER'] = int(os.environ.get('LIVE_SESSION_MAX_PER_USER', 10))
+# Seconds a user record is served from the per-process cache; 0 disables it
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 30))
+app.config['USER_CACHE_MAX'] = int(os.environ.get('USER_CACHE_MAX', 10000))
+# Request threads of the WSGI server (waitress defaults to 4); other limits
+# are sized against it
+app.config['SERVER_THREADS'] = int(os.environ.get('SERVER_THREADS', 4))
+# Password hashing runs on its own bounded thread pool; changing the method or
+# its cost (e.g. scrypt:65536:8:1) rehashes each password at its next login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0)) or None
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2))
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -73,6 +117,61 @@ def _jwt_expired_token(jwt_header, jwt_payload):
 def _jwt_revoked_token(jwt_header, jwt_payload):
     return jsonify({'message': 'Token has been revoked', 'error': 'revoked_token'}), 401
 
+# Characters of each history text kept uncompressed for listings
+HISTORY_PREVIEW_LENGTH = 200
+# History texts at least this many UTF-8 bytes are stored zlib-compressed
+HISTORY_COMPRESS_THRESHOLD = int(os.environ.get('HISTORY_COMPRESS_THRESHOLD', 1024))
+
+def text_digest(text):
+    """Content hash used to identify history texts"""
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def insert_ignore(model, index_elements, rows, returning=()):
+    """INSERT rows, skipping those that conflict on index_elements.
+
+    Returns the `returning` columns of the rows actually inserted. SQLite and
+    PostgreSQL do it in one ON CONFLICT DO NOTHING statement; other dialects
+    insert row by row, each under a savepoint rolled back on IntegrityError.
+    """
+    if not rows:
+        return []
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return _insert_each_ignoring_conflicts(model, rows, returning)
+    statement = insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    if not returning:
+        db.session.execute(statement, rows)
+        return []
+    return db.session.execute(statement.returning(*returning), rows).all()
+
+def _insert_each_ignoring_conflicts(model, rows, returning=()):
+    """insert_ignore() for dialects without ON CONFLICT"""
+    [primary_key] = model.__table__.primary_key.columns
+    inserted = []
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                result = db.session.execute(db.insert(model.__table__), row)
+        except IntegrityError:
+            continue
+        if returning:
+            inserted.append(db.session.execute(
+                db.select(*returning).where(primary_key == result.inserted_primary_key[0])
+            ).one())
+    return inserted
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked per connection"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
 # Define models directly here to avoid circular imports
 class User(db.Model):
     """User model for authentication and user management"""
@@ -84,20 +183,22 @@ class User(db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Only set by create_admin_user(), never through the API
+    is_admin = db.Column(db.Boolean, nullable=False, default=False)
     
-    def __init__(self, username, email, password):
+    def __init__(self, username, email, password, is_admin=False):
         self.username = username
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
+        self.is_admin = is_admin
     
     def check_password(self, password):
         """Check if provided password matches the hash"""
-        from werkzeug.security import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)[0]
     
     def set_password(self, password):
         """Set new password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def to_dict(self):
         """Convert user object to dictionary"""
@@ -105,6 +206,7 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'email': self.email,
+            'is_admin': bool(self.is_admin),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -117,24 +219,111 @@ class CipherHistory(db.Model):
     __tablename__ = 'cipher_history'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     cipher_type = db.Column(db.String(50), nullable=False)
     operation = db.Column(db.String(10), nullable=False)  # 'encode' or 'decode'
-    input_text = db.Column(db.Text, nullable=False)
-    output_text = db.Column(db.Text, nullable=False)
+    # Texts live in history_blobs keyed by input_hash/output_hash; these
+    # inline columns only hold rows written before that (empty otherwise)
+    _input_text = db.Column('input_text', db.Text, nullable=False, default='')
+    _output_text = db.Column('output_text', db.Text, nullable=False, default='')
     key_used = db.Column(db.String(100), nullable=True)  # For ciphers that require keys
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Summary of the texts so listings never need to load them
+    input_length = db.Column(db.Integer, nullable=True)
+    output_length = db.Column(db.Integer, nullable=True)
+    # sha256 of the UTF-8 text; the foreign key stops a prune from deleting
+    # a blob that a concurrent, not yet committed insert has just referenced
+    input_hash = db.Column(db.String(64), db.ForeignKey('history_blobs.hash'), nullable=True, index=True)
+    output_hash = db.Column(db.String(64), db.ForeignKey('history_blobs.hash'), nullable=True, index=True)
+    
+    # Serves the per-user "newest first" listing and its keyset cursor
+    __table_args__ = (
+        # Same direction on both columns as the listing's ORDER BY, so a keyset
+        # page is a single range seek
+        db.Index('ix_cipher_history_user_keyset', user_id, timestamp.desc(), id.desc()),
+    )
     
     # Relationship
-    user = db.relationship('User', backref=db.backref('cipher_history', lazy=True, cascade='all, delete-orphan'))
+    # The database deletes a user's rows (ON DELETE CASCADE); the ORM never loads them for that
+    user = db.relationship('User', backref=db.backref('cipher_history', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
+    input_blob = db.relationship(
+        'HistoryBlob', primaryjoin='foreign(CipherHistory.input_hash) == HistoryBlob.hash', viewonly=True
+    )
+    output_blob = db.relationship(
+        'HistoryBlob', primaryjoin='foreign(CipherHistory.output_hash) == HistoryBlob.hash', viewonly=True
+    )
     
     def __init__(self, user_id, cipher_type, operation, input_text, output_text, key_used=None):
-        self.user_id = user_id
-        self.cipher_type = cipher_type
-        self.operation = operation
-        self.input_text = input_text
-        self.output_text = output_text
-        self.key_used = key_used
+        """Texts are stored in history_blobs when the row is flushed (see _store_pending_blobs)"""
+        row = CipherHistory.build_row(user_id, cipher_type, operation, input_text, output_text, key_used)
+        self._pending_blobs = {
+            row['input_hash']: row.pop('input_text'),
+            row['output_hash']: row.pop('output_text')
+        }
+        for name, value in row.items():
+            setattr(self, name, value)
+    
+    @staticmethod
+    def build_row(user_id, cipher_type, operation, input_text, output_text, key_used=None):
+        """Column values for a bulk insert of history rows.
+
+        The timestamp is taken here, at the operation, not by the column
+        default when a write-behind flush inserts the row later.
+        """
+        return {
+            'user_id': user_id,
+            'cipher_type': cipher_type,
+            'operation': operation,
+            'input_text': input_text,
+            'output_text': output_text,
+            'key_used': key_used,
+            'input_length': len(input_text),
+            'output_length': len(output_text),
+            'input_hash': text_digest(input_text),
+            'output_hash': text_digest(output_text),
+            'timestamp': datetime.utcnow()
+        }
+    
+    @property
+    def input_text(self):
+        return self._text('input')
+    
+    @property
+    def output_text(self):
+        return self._text('output')
+    
+    def _text(self, field):
+        pending = self.__dict__.get('_pending_blobs')
+        if pending:
+            return pending[getattr(self, f'{field}_hash')]
+        inline, digest = getattr(self, f'_{field}_text'), getattr(self, f'{field}_hash')
+        if inline or digest is None:
+            return inline
+        blob = getattr(self, f'{field}_blob')
+        if blob is None:
+            raise LookupError(f'History text {digest} is missing from history_blobs')
+        return blob.text
+    
+    @staticmethod
+    def delete_for_user(user_id, chunk_size=500):
+        """Delete a user's history in committed chunks, pruning orphaned blobs.
+
+        Each chunk is its own short transaction so SQLite's write lock is
+        released between chunks. Returns the number of rows deleted.
+        """
+        deleted = 0
+        while True:
+            rows = db.session.query(
+                CipherHistory.id, CipherHistory.input_hash, CipherHistory.output_hash
+            ).filter_by(user_id=user_id).limit(chunk_size).all()
+            if not rows:
+                return deleted
+            CipherHistory.query.filter(
+                CipherHistory.id.in_([row.id for row in rows])
+            ).delete(synchronize_session=False)
+            HistoryBlob.prune([digest for row in rows for digest in row[1:]])
+            db.session.commit()
+            deleted += len(rows)
     
     def to_dict(self):
         """Convert history object to dictionary"""
@@ -144,6 +333,28 @@ class CipherHistory(db.Model):
             'operation': self.operation,
             'input_text': self.input_text,
             'output_text': self.output_text,
+            'input_length': self.input_length,
+            'output_length': self.output_length,
+            'input_hash': self.input_hash,
+            'output_hash': self.output_hash,
+            'key': self.key_used,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+        }
+    
+    def to_summary_dict(self, input_preview, output_preview):
+        """Listing form: previews instead of the (deferred) full texts"""
+        return {
+            'id': self.id,
+            'cipher_type': self.cipher_type,
+            'operation': self.operation,
+            'input_text': input_preview,
+            'output_text': output_preview,
+            'input_length': self.input_length,
+            'output_length': self.output_length,
+            'input_truncated': (self.input_length or 0) > len(input_preview or ''),
+            'output_truncated': (self.output_length or 0) > len(output_preview or ''),
+            'input_hash': self.input_hash,
+            'output_hash': self.output_hash,
             'key': self.key_used,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
@@ -151,16 +362,117 @@ class CipherHistory(db.Model):
     def __repr__(self):
         return f'<CipherHistory {self.cipher_type}:{self.operation}>'
 
+class HistoryBlob(db.Model):
+    """Content-addressed store for history texts, shared by every row with the same text"""
+    __tablename__ = 'history_blobs'
+    
+    hash = db.Column(db.String(64), primary_key=True)  # text_digest() of the text
+    codec = db.Column(db.String(10), nullable=False)  # 'raw' or 'zlib'
+    data = db.Column(db.LargeBinary, nullable=False)  # UTF-8 bytes, possibly compressed
+    length = db.Column(db.Integer, nullable=False)
+    preview = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    @staticmethod
+    def build_row(digest, text):
+        """Column values for storing text under its digest"""
+        data = text.encode('utf-8', 'surrogatepass')
+        codec = 'raw'
+        if len(data) >= HISTORY_COMPRESS_THRESHOLD:
+            packed = zlib.compress(data, 6)
+            if len(packed) < len(data):
+                data, codec = packed, 'zlib'
+        return {
+            'hash': digest,
+            'codec': codec,
+            'data': data,
+            'length': len(text),
+            'preview': text[:HISTORY_PREVIEW_LENGTH]
+        }
+    
+    @property
+    def text(self):
+        data = zlib.decompress(self.data) if self.codec == 'zlib' else self.data
+        return data.decode('utf-8', 'surrogatepass')
+    
+    @staticmethod
+    def iter_text(digest, chunk_bytes=256 * 1024):
+        """Yield a stored text piece by piece without loading or inflating it whole"""
+        codec, size = db.session.query(
+            HistoryBlob.codec, func.length(HistoryBlob.data)
+        ).filter_by(hash=digest).one()
+        decoder = codecs.getincrementaldecoder('utf-8')('surrogatepass')
+        inflater = zlib.decompressobj() if codec == 'zlib' else None
+        for start in range(1, size + 1, chunk_bytes):
+            piece = db.session.query(
+                func.substr(HistoryBlob.data, start, chunk_bytes)
+            ).filter_by(hash=digest).scalar()
+            if inflater is not None:
+                piece = inflater.decompress(piece)
+            yield decoder.decode(piece)
+        tail = inflater.flush() if inflater is not None else b''
+        yield decoder.decode(tail, final=True)
+    
+    @staticmethod
+    def prune(digests):
+        """Delete blobs among digests that no history row references any more.
+
+        Each chunk is one DELETE ... WHERE NOT EXISTS. If a concurrent insert
+        references a blob after the statement's snapshot, the foreign keys
+        reject the delete; the chunk is then retried with a fresh snapshot.
+        """
+        digests = [digest for digest in set(digests) if digest]
+        for start in range(0, len(digests), 500):
+            statement = db.delete(HistoryBlob).where(
+                HistoryBlob.hash.in_(digests[start:start + 500]),
+                ~db.exists().where(CipherHistory.input_hash == HistoryBlob.hash),
+                ~db.exists().where(CipherHistory.output_hash == HistoryBlob.hash)
+            )
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(statement)
+            except IntegrityError:
+                db.session.execute(statement)
+
+def insert_history_rows(rows):
+    """Insert history rows from CipherHistory.build_row, storing each distinct text once"""
+    blobs = {}
+    history = []
+    for row in rows:
+        row = dict(row)
+        for field in ('input', 'output'):
+            text = row.pop(f'{field}_text')
+            digest = row[f'{field}_hash']
+            if digest not in blobs:
+                blobs[digest] = HistoryBlob.build_row(digest, text)
+        history.append(row)
+    insert_ignore(HistoryBlob, ['hash'], list(blobs.values()))
+    db.session.execute(db.insert(CipherHistory), history)
+
+@event.listens_for(Session, 'before_flush')
+def _store_pending_blobs(session, flush_context, instances):
+    """Write the texts of CipherHistory objects built with the constructor to history_blobs"""
+    blobs = {}
+    for obj in session.new:
+        if isinstance(obj, CipherHistory):
+            for digest, text in obj.__dict__.pop('_pending_blobs', {}).items():
+                blobs.setdefault(digest, HistoryBlob.build_row(digest, text))
+    if blobs:
+        insert_ignore(HistoryBlob, ['hash'], list(blobs.values()))
+
 class Favorite(db.Model):
     """Model for storing user favorite ciphers"""
     __tablename__ = 'favorites'
+    # One row per user and cipher, so adding is a single INSERT ... ON CONFLICT DO NOTHING
+    __table_args__ = (
+        db.Index('ux_favorites_user_cipher', 'user_id', 'cipher_type', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     cipher_type = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    # Constraint idea (not enforced automatically in SQLite without explicit UniqueConstraint in create_all) but we can enforce in code.
 
-    user = db.relationship('User', backref=db.backref('favorites', lazy=True, cascade='all, delete-orphan'))
+    user = db.relationship('User', backref=db.backref('favorites', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
 
     def to_dict(self):
         return {
@@ -169,6 +481,66 @@ class Favorite(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# History persistence (synchronous unless HISTORY_WRITE_BEHIND is set)
+from utils.history_writer import HistoryWriter
+history_writer = HistoryWriter(app, db, insert_history_rows)
+
+# Shared cache of deterministic cipher results
+from utils.result_cache import ResultCache
+result_cache = ResultCache(
+    max_bytes=app.config['RESULT_CACHE_MAX_BYTES'],
+    max_entry_bytes=app.config['RESULT_CACHE_ENTRY_MAX_BYTES'],
+    ttl=app.config['RESULT_CACHE_TTL']
+)
+
+# Worker processes for large payloads
+from utils.cipher_pool import CipherPool
+cipher_pool = CipherPool(
+    threshold=app.config['CIPHER_OFFLOAD_THRESHOLD'],
+    workers=app.config['CIPHER_POOL_WORKERS'],
+    max_pending=app.config['CIPHER_POOL_MAX_PENDING'],
+    timeout=app.config['CIPHER_POOL_TIMEOUT'],
+    chunk_size=app.config['CIPHER_POOL_CHUNK_SIZE']
+)
+
+# In-memory state of live-typing sessions
+from utils.live_session import LiveSessionStore
+live_sessions = LiveSessionStore(
+    max_sessions=app.config['LIVE_SESSION_MAX'],
+    ttl=app.config['LIVE_SESSION_TTL'],
+    max_per_user=app.config['LIVE_SESSION_MAX_PER_USER']
+)
+
+# Recently seen user records, so authenticated routes can skip the users query
+from utils.user_cache import UserCache
+user_cache = UserCache(
+    max_entries=app.config['USER_CACHE_MAX'],
+    ttl=app.config['USER_CACHE_TTL']
+)
+
+# Each user's favorites list and its ETag
+favorites_cache = UserCache(
+    max_entries=app.config['USER_CACHE_MAX'],
+    ttl=app.config['USER_CACHE_TTL']
+)
+
+def get_user_record(user_id):
+    """to_dict() of a user through the user cache, or None if there is no such user"""
+    def load():
+        user = User.query.get(user_id)
+        return user.to_dict() if user else None
+    return user_cache.get(user_id, load)
+
+# Password hashing off the request threads
+from utils.password_hasher import PasswordHasher
+password_hasher = PasswordHasher(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+    server_threads=app.config['SERVER_THREADS']
+)
+
 # Import routes
 from routes.auth import auth_bp
 from routes.cipher import cipher_bp
@@ -189,21 +561,185 @@ def health_check():
         'message': 'CodeCrypt API running'
     })
 
+@app.route('/api/metrics', methods=['GET'])
+@jwt_required()
+def metrics():
+    record = get_user_record(int(get_jwt_identity()))
+    if record is None or not record['is_admin']:
+        return jsonify({'message': 'Admin access required'}), 403
+    return jsonify({
+        'history_writer': history_writer.stats(),
+        'result_cache': result_cache.stats(),
+        'cipher_pool': cipher_pool.stats(),
+        'live_sessions': live_sessions.stats(),
+        'user_cache': user_cache.stats(),
+        'favorites_cache': favorites_cache.stats(),
+        'password_hasher': password_hasher.stats()
+    })
+
 # Initialize database
 def init_db():
     """Initialize database tables"""
     db.create_all()
+    upgrade_schema()
+
+def prepare_database():
+    """Create and upgrade the schema, then the admin account; every server entry point runs this first"""
+    with app.app_context():
+        init_db()
+        print('[DB] Tables ensured.')
+        # optional admin auto-create if env set
+        if os.environ.get('CREATE_ADMIN', 'true').lower() in ('1','true','yes'):
+            try:
+                create_admin_user()
+            except Exception as e:
+                print('Admin creation skipped:', e)
+
+# Indexes replaced by differently named ones in the models
+OBSOLETE_INDEXES = ('ix_cipher_history_user_timestamp',)
+
+def upgrade_schema():
+    """Apply model additions that db.create_all() skips on existing tables"""
+    # Before the rebuild, which copies favorites into a table with the unique index
+    _dedupe_favorites()
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            # New columns are always added as nullable
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    # After the columns, which the constraints may reference
+    _rebuild_foreign_keys()
+    with db.engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+    _migrate_history_texts()
+
+def _rebuild_foreign_keys():
+    """Bring foreign keys that are missing or predate ON DELETE CASCADE up to the models.
+
+    SQLite cannot alter constraints in place, so there the table is rebuilt;
+    other databases drop the stale constraints and add the model's.
+    """
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        wanted = {fk.parent.name: (fk.ondelete or '').upper() for fk in table.foreign_keys}
+        if not wanted or not inspector.has_table(table.name):
+            continue
+        current = {
+            fk['constrained_columns'][0]: fk for fk in inspector.get_foreign_keys(table.name)
+        }
+        stale = {
+            column for column, ondelete in wanted.items()
+            if column not in current
+            or (current[column].get('options', {}).get('ondelete') or '').upper() != ondelete
+        }
+        if not stale:
+            continue
+        if db.engine.dialect.name == 'sqlite':
+            _rebuild_sqlite_table(table, inspector)
+        else:
+            _replace_foreign_keys(table, stale, [current[column] for column in stale if column in current])
+        inspector = db.inspect(db.engine)
+
+def _replace_foreign_keys(table, columns, existing):
+    """Drop the existing foreign keys on columns and add the model's, in one transaction"""
+    preparer = db.engine.dialect.identifier_preparer
+    drop = 'DROP FOREIGN KEY' if db.engine.dialect.name == 'mysql' else 'DROP CONSTRAINT'
+    with db.engine.begin() as conn:
+        for fk in existing:
+            conn.execute(db.text(f'ALTER TABLE {preparer.quote(table.name)} {drop} {preparer.quote(fk["name"])}'))
+        for constraint in table.foreign_key_constraints:
+            if set(constraint.column_keys) & columns:
+                conn.execute(AddConstraint(constraint))
+
+def _rebuild_sqlite_table(table, inspector):
+    """Recreate a SQLite table from its model: renamed, created again and refilled in one transaction"""
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    columns = ', '.join(column.name for column in table.columns if column.name in existing)
+    legacy = f'{table.name}_legacy'
+    raw = db.engine.raw_connection()
+    conn = raw.driver_connection
+    previous_isolation = conn.isolation_level
+    try:
+        # Manual transaction control so the DDL is transactional too
+        conn.isolation_level = None
+        conn.execute('PRAGMA foreign_keys=OFF')
+        conn.execute('BEGIN')
+        try:
+            for index in inspector.get_indexes(table.name):
+                conn.execute(f'DROP INDEX IF EXISTS {index["name"]}')
+            conn.execute(f'ALTER TABLE {table.name} RENAME TO {legacy}')
+            conn.execute(str(CreateTable(table).compile(dialect=db.engine.dialect)))
+            for index in table.indexes:
+                conn.execute(str(CreateIndex(index).compile(dialect=db.engine.dialect)))
+            conn.execute(f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {legacy}')
+            conn.execute(f'DROP TABLE {legacy}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.execute('PRAGMA foreign_keys=ON')
+    finally:
+        conn.isolation_level = previous_isolation
+        raw.close()
+
+def _dedupe_favorites():
+    """Drop duplicate favorites left from before the unique index, keeping the oldest"""
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(Favorite.__tablename__):
+        return
+    indexes = {index['name'] for index in inspector.get_indexes(Favorite.__tablename__)}
+    if 'ux_favorites_user_cipher' in indexes:
+        return
+    keep = db.select(func.min(Favorite.id)).group_by(Favorite.user_id, Favorite.cipher_type)
+    with db.engine.begin() as conn:
+        conn.execute(db.delete(Favorite).where(Favorite.id.not_in(keep)))
+
+def _migrate_history_texts(batch_size=500):
+    """Move inline history texts into history_blobs, filling lengths and hashes"""
+    while True:
+        rows = db.session.query(
+            CipherHistory.id, CipherHistory._input_text, CipherHistory._output_text
+        ).filter(or_(
+            CipherHistory.input_hash.is_(None),
+            CipherHistory.output_hash.is_(None),
+            CipherHistory._input_text != '',
+            CipherHistory._output_text != ''
+        )).limit(batch_size).all()
+        if not rows:
+            return
+        blobs = {}
+        updates = []
+        for row_id, input_text, output_text in rows:
+            update = {'id': row_id, '_input_text': '', '_output_text': ''}
+            for field, text in (('input', input_text), ('output', output_text)):
+                digest = text_digest(text)
+                blobs.setdefault(digest, HistoryBlob.build_row(digest, text))
+                update[f'{field}_hash'] = digest
+                update[f'{field}_length'] = len(text)
+            updates.append(update)
+        insert_ignore(HistoryBlob, ['hash'], list(blobs.values()))
+        db.session.execute(db.update(CipherHistory), updates)
+        db.session.commit()
 
 def create_admin_user():
     with app.app_context():
         # Use the User model defined in this file, not from models.user
-        admin_email = os.environ.get('ADMIN_EMAIL', 'admin@codecrypt.com')
+        admin_email = app.config['ADMIN_EMAIL']
         admin = User.query.filter_by(email=admin_email).first()
         if not admin:
             admin = User(
                 username=os.environ.get('ADMIN_USERNAME', 'admin'),
                 email=admin_email,
-                password=os.environ.get('ADMIN_PASSWORD', 'admin123')
+                password=os.environ.get('ADMIN_PASSWORD', 'admin123'),
+                is_admin=True
             )
             db.session.add(admin)
             db.session.commit()
@@ -222,15 +758,7 @@ def api_info():
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', 'true').lower() in ('1','true','yes')
-    with app.app_context():
-        db.create_all()
-        print('[DB] Tables ensured.')
-        # optional admin auto-create if env set
-        if os.environ.get('CREATE_ADMIN', 'true').lower() in ('1','true','yes'):
-            try:
-                create_admin_user()
-            except Exception as e:
-                print('Admin creation skipped:', e)
+    prepare_database()
     print(f"Starting CodeCrypt API on port {port} | Debug={debug}")
     print('DB URL:', app.config['SQLALCHEMY_DATABASE_URI'])
     print('[RUN] Entering app.run ...', flush=True)
@@ -0,0 +1,78 @@
+"""Benchmark for the Vigenère key recovery engine.
+
+Encrypts English text sampled from the wordfreq word list at sizes from 100
+characters to 1 MB, runs the solver and reports, per size:
+ 1. Whether the recovered key matches
+ 2. Time spent ranking key lengths, solving columns and hill-climbing
+ 3. Total wall time, in process or on the cipher worker pool
+
+Usage:
+  python benchmark_vigenere.py
+  python benchmark_vigenere.py --pool --workers 4
+  python benchmark_vigenere.py --sizes 1000 100000 --repeat 3
+"""
+from __future__ import annotations
+import argparse, itertools, random, time
+
+from utils.ciphers import CipherAlgorithms
+from utils.cipher_pool import CipherPool
+from utils.vigenere_solver import solve
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+KEYS = ['KEY', 'LEMON', 'CIPHER', 'DICKENS', 'CRYPTOGRAPHY']
+
+def sample_text(size, rng):
+    from wordfreq import get_frequency_dict, iter_wordlist
+    frequencies = get_frequency_dict('en')
+    words = list(itertools.islice(iter_wordlist('en'), 5000))
+    weights = [frequencies[word] for word in words]
+    parts, length = [], 0
+    while length < size:
+        sentence = ' '.join(rng.choices(words, weights, k=12)).capitalize() + '. '
+        parts.append(sentence)
+        length += len(sentence)
+    return ''.join(parts)[:size]
+
+def run_case(size, key, rng, runner):
+    ciphertext = CipherAlgorithms.vigenere_encode(sample_text(size, rng), key)
+    started = time.perf_counter()
+    best = None
+    for _, best in solve(ciphertext, runner=runner):
+        pass
+    elapsed = (time.perf_counter() - started) * 1000
+    return best, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--pool', action='store_true', help='solve key lengths on the worker pool')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = CipherPool(threshold=1, workers=args.workers, timeout=600) if args.pool else None
+    runner = pool.imap_unordered if pool else None
+
+    # Build the n-gram tables outside the timings
+    run_case(200, 'WARM', rng, None)
+    if pool:
+        run_case(200, 'WARM', rng, runner)
+
+    print(f'[BENCH] {"size":>8} {"key":>13} {"found":>13} ok {"lengths":>9} {"columns":>9} {"refine":>9} {"total":>9}')
+    try:
+        for size in args.sizes:
+            for attempt in range(args.repeat):
+                key = KEYS[(len(str(size)) + attempt) % len(KEYS)]
+                best, elapsed = run_case(size, key, rng, runner)
+                timings = best['timings_ms']
+                print(f'[BENCH] {size:>8} {key:>13} {best["key"]:>13} {"Y" if best["key"] == key else "N":>2} '
+                      f'{timings["key_lengths"]:>8.1f}ms {timings["columns"]:>7.1f}ms '
+                      f'{timings["refine"]:>7.1f}ms {elapsed:>7.1f}ms')
+    finally:
+        if pool:
+            pool.shutdown()
+
+if __name__ == '__main__':
+    main()
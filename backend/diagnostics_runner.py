@@ -75,12 +75,13 @@ def main():
         return
     # Full application path
     print('[FULL] Importing full app')
-    from app import app
+    from app import app, prepare_database
+    prepare_database()
     if use_waitress:
         try:
             import waitress
             print('[FULL] Starting full app with waitress')
-            waitress.serve(app, host='127.0.0.1', port=PORT)
+            waitress.serve(app, host='127.0.0.1', port=PORT, threads=app.config['SERVER_THREADS'])
         except Exception as e:
             print('[FULL] Waitress failed:', e)
     else:
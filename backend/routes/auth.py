@@ -1,9 +1,52 @@
+import re
+
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from utils.password_hasher import PasswordHasherBusyError
 
 auth_bp = Blueprint('auth', __name__)
 
+# Seconds clients are asked to wait when every password hashing slot is busy
+HASHER_RETRY_AFTER = 1
+
+# Column named by a unique-violation message: users.email (SQLite, MySQL),
+# users_email_key / ix_users_email (PostgreSQL)
+_UNIQUE_COLUMN = re.compile(r'users[._](email|username)(?:_key\b|\b)')
+
+_CONFLICT_MESSAGES = {
+    'email': 'Email already registered',
+    'username': 'Username already taken',
+}
+
+def _hasher_busy(e):
+    response = jsonify({'message': str(e)})
+    response.headers['Retry-After'] = str(HASHER_RETRY_AFTER)
+    return response, 503
+
+def _conflict_message(error, email, username, user_id=None):
+    """409 message for a unique violation on users, or None if it was something else"""
+    # The first line names the constraint; details below it may quote values
+    match = _UNIQUE_COLUMN.search(str(error.orig).split('\n', 1)[0])
+    if match:
+        return _CONFLICT_MESSAGES[match.group(1)]
+    
+    # Driver without the constraint name: one lookup on the failure path only
+    from app import User
+    conditions = []
+    if email is not None:
+        conditions.append(User.email == email)
+    if username is not None:
+        conditions.append(User.username == username)
+    query = User.query.filter(or_(*conditions))
+    if user_id is not None:
+        query = query.filter(User.id != user_id)
+    existing = query.first() if conditions else None
+    if existing is None:
+        return None
+    return _CONFLICT_MESSAGES['email' if existing.email == email else 'username']
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -28,17 +71,17 @@ def register():
         # Import here to avoid circular imports
         from app import db, User
         
-        # Check if user already exists
-        if User.query.filter_by(email=email).first():
-            return jsonify({'message': 'Email already registered'}), 409
-        
-        if User.query.filter_by(username=username).first():
-            return jsonify({'message': 'Username already taken'}), 409
-        
-        # Create new user
+        # The unique constraints on email and username reject duplicates
         user = User(username=username, email=email, password=password)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            message = _conflict_message(e, email, username)
+            if message is None:
+                raise
+            return jsonify({'message': message}), 409
         
         # Create access token (identity must be str for newer flask-jwt-extended)
         access_token = create_access_token(identity=str(user.id))
@@ -49,6 +92,8 @@ def register():
             'token': access_token
         }), 201
         
+    except PasswordHasherBusyError as e:
+        return _hasher_busy(e)
     except Exception as e:
         from app import db
         db.session.rollback()
@@ -69,23 +114,38 @@ def login():
 
         password = data['password']
 
-        from app import User
+        from app import db, User, password_hasher
         user = User.query.filter_by(email=identifier.lower()).first()
         if not user:
             user = User.query.filter_by(username=identifier).first()
+        if not user:
+            return jsonify({'message': 'Invalid credentials'}), 401
 
-        if not user or not user.check_password(password):
+        matches, new_hash = password_hasher.verify(user.password_hash, password)
+        if not matches:
             return jsonify({'message': 'Invalid credentials'}), 401
+        if new_hash is not None:
+            # Stored with an older method or cost
+            user.password_hash = new_hash
+            db.session.commit()
 
         access_token = create_access_token(identity=str(user.id))
+        # The dashboard asks for /me right after signing in
+        from app import user_cache
+        record = user.to_dict()
+        user_cache.store(user.id, record)
 
         return jsonify({
             'message': 'Login successful',
-            'user': user.to_dict(),
+            'user': record,
             'token': access_token
         }), 200
 
+    except PasswordHasherBusyError as e:
+        return _hasher_busy(e)
     except Exception as e:
+        from app import db
+        db.session.rollback()
         return jsonify({'message': 'Login failed', 'error': str(e)}), 500
 
 @auth_bp.route('/me', methods=['GET'])
@@ -98,13 +158,13 @@ def get_current_user():
             user_id = int(user_id)
         except (TypeError, ValueError):
             return jsonify({'message': 'Invalid token subject'}), 422
-        from app import User
-        user = User.query.get(user_id)
+        from app import get_user_record
+        user = get_user_record(user_id)
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        return jsonify(user.to_dict()), 200
+        return jsonify(user), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to get user info', 'error': str(e)}), 500
@@ -128,6 +188,7 @@ def update_profile():
         data = request.get_json()
         if not data:
             return jsonify({'message': 'No data provided'}), 400
+        username = email = None
         
         # Update username if provided
         if 'username' in data:
@@ -135,22 +196,11 @@ def update_profile():
             if len(username) < 3:
                 return jsonify({'message': 'Username must be at least 3 characters long'}), 400
             
-            # Check if username is already taken by another user
-            existing = User.query.filter_by(username=username).first()
-            if existing and existing.id != user.id:
-                return jsonify({'message': 'Username already taken'}), 409
-            
             user.username = username
         
         # Update email if provided
         if 'email' in data:
             email = data['email'].strip().lower()
-            
-            # Check if email is already taken by another user
-            existing = User.query.filter_by(email=email).first()
-            if existing and existing.id != user.id:
-                return jsonify({'message': 'Email already registered'}), 409
-            
             user.email = email
         
         # Update password if provided
@@ -161,13 +211,29 @@ def update_profile():
             
             user.set_password(password)
         
-        db.session.commit()
+        # Taken usernames and emails surface as unique violations
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            message = _conflict_message(e, email, username, user_id)
+            if message is None:
+                raise
+            return jsonify({'message': message}), 409
+        
+        from app import user_cache
+        record = user.to_dict()
+        user_cache.store(user.id, record)
         
         return jsonify({
             'message': 'Profile updated successfully',
-            'user': user.to_dict()
+            'user': record
         }), 200
         
+    except PasswordHasherBusyError as e:
+        from app import db
+        db.session.rollback()
+        return _hasher_busy(e)
     except Exception as e:
         from app import db
         db.session.rollback()
@@ -183,16 +249,22 @@ def delete_account():
             user_id = int(user_id)
         except (TypeError, ValueError):
             return jsonify({'message': 'Invalid token subject'}), 422
-        from app import db, User
+        from app import db, User, CipherHistory
         user = User.query.get(user_id)
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        # Delete user (this will cascade delete cipher history due to relationship)
+        # History goes first in bounded chunks (also pruning its stored texts);
+        # the database cascades the rest when the user row is deleted
+        CipherHistory.delete_for_user(user_id)
         db.session.delete(user)
         db.session.commit()
         
+        from app import favorites_cache, user_cache
+        user_cache.invalidate(user_id)
+        favorites_cache.invalidate(user_id)
+        
         return jsonify({'message': 'Account deleted successfully'}), 200
         
     except Exception as e:
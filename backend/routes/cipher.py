@@ -1,9 +1,128 @@
-from flask import Blueprint, request, jsonify
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import aliased, defer
+from utils.cipher_pool import CipherPoolBusyError, CipherPoolTimeoutError
 from utils.ciphers import CIPHER_FUNCTIONS
+from utils.static_response import StaticJSON
+from utils import auto_decoder, text_stats
+from utils.cracking import DEFAULT_TOP_K, KEY_SPACES, crack
+from utils.substitution_solver import DEFAULT_RESTARTS, MAX_RESTARTS, solve as solve_substitution
+from utils.vigenere_solver import MAX_KEY_LENGTH, solve as solve_vigenere
 
 cipher_bp = Blueprint('cipher', __name__)
 
+# Upper bound on the number of operations accepted by /batch
+MAX_BATCH_ITEMS = 500
+
+# Characters per slice when streaming an inline (pre-blob) history text
+HISTORY_DOWNLOAD_CHUNK = 256 * 1024
+
+def _resolve_cipher(cipher_type, operation, key):
+    """Return a text -> result callable for the cipher, raising ValueError if invalid"""
+    if cipher_type not in CIPHER_FUNCTIONS:
+        raise ValueError(f'Unsupported cipher type: {cipher_type}')
+    
+    cipher_config = CIPHER_FUNCTIONS[cipher_type]
+    if operation not in ('encode', 'decode'):
+        raise ValueError(f'Unsupported operation: {operation}')
+    
+    # Check if key is required
+    if cipher_config['requires_key'] and not key:
+        raise ValueError(f'{cipher_type} cipher requires a key')
+    
+    func = cipher_config[operation]
+    if cipher_config['requires_key']:
+        return lambda text: func(text, key)
+    return func
+
+def _encode_history_cursor(item):
+    """Opaque cursor pointing just past a history row"""
+    raw = f'{item.timestamp.isoformat()}|{item.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_history_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, last_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(last_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+def _int_option(data, name, default, low, high):
+    try:
+        value = int(data.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+    if not low <= value <= high:
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return value
+
+def _solver_results(cipher_type, text, data):
+    """(result, best_so_far) generator of the key-recovery solver for cipher_type"""
+    from app import cipher_pool
+    runner = cipher_pool.imap_unordered if cipher_pool.enabled else None
+    
+    if cipher_type == 'vigenere':
+        max_key_length = _int_option(data, 'max_key_length', MAX_KEY_LENGTH, 1, 2 * MAX_KEY_LENGTH)
+        return solve_vigenere(text, max_key_length, runner=runner), 'key_lengths_tried'
+    restarts = _int_option(data, 'restarts', DEFAULT_RESTARTS, 1, MAX_RESTARTS)
+    return solve_substitution(text, restarts, runner=runner), 'restarts_run'
+
+def _solver_candidates(cipher_type, text, data, top_k):
+    """Recover a Vigenère or substitution key, as JSON or as NDJSON lines of best-so-far keys"""
+    results, tried_label = _solver_results(cipher_type, text, data)
+    decode = CIPHER_FUNCTIONS[cipher_type]['decode']
+    # Surfaces bad input and a busy pool before any response is started
+    first = next(results)
+    
+    if data.get('stream'):
+        def generate():
+            best = first[1]
+            try:
+                yield json.dumps({'result': first[0], 'best': best}) + '\n'
+                for result, best in results:
+                    yield json.dumps({'result': result, 'best': best}) + '\n'
+                yield json.dumps({'done': True, 'best': best, 'plaintext': decode(text, best['key'])}) + '\n'
+            except (CipherPoolBusyError, CipherPoolTimeoutError) as e:
+                yield json.dumps({'done': True, 'best': best, 'error': str(e)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    solved = [first[0]] + [result for result, _ in results]
+    solved.sort(key=lambda result: (result['score'], -len(result['key'])), reverse=True)
+    # Several key lengths or restarts can land on the same key
+    candidates = []
+    for result in solved:
+        if len(candidates) < max(1, top_k) and all(result['key'] != seen['key'] for seen in candidates):
+            candidates.append(result)
+    for candidate in candidates:
+        candidate['plaintext'] = decode(text, candidate['key'])
+    
+    return jsonify({
+        'cipher_type': cipher_type,
+        tried_label: len(solved),
+        'candidates': candidates
+    }), 200
+
+def _run_cipher(cipher_type, operation, key, text, func=None):
+    """Run a cipher through the shared result cache, offloading large texts to worker processes"""
+    if func is None:
+        func = _resolve_cipher(cipher_type, operation, key)
+    from app import result_cache, cipher_pool
+    
+    def compute():
+        if cipher_pool.should_offload(text):
+            return cipher_pool.run(cipher_type, operation, key, text)
+        return func(text)
+    
+    return result_cache.get_or_compute(cipher_type, operation, key, text, compute)
+
 @cipher_bp.route('/encode', methods=['POST'])
 @jwt_required()
 def encode_text():
@@ -18,36 +137,20 @@ def encode_text():
         cipher_type = data['cipher_type']
         key = data.get('key')
         
-        # Validate cipher type
-        if cipher_type not in CIPHER_FUNCTIONS:
-            return jsonify({'message': f'Unsupported cipher type: {cipher_type}'}), 400
-        
-        cipher_config = CIPHER_FUNCTIONS[cipher_type]
-        
-        # Check if key is required
-        if cipher_config['requires_key'] and not key:
-            return jsonify({'message': f'{cipher_type} cipher requires a key'}), 400
-        
-        # Encode the text
-        encode_func = cipher_config['encode']
-        if cipher_config['requires_key']:
-            result = encode_func(text, key)
-        else:
-            result = encode_func(text)
+        # Validates cipher type and key, then encodes the text
+        result = _run_cipher(cipher_type, 'encode', key, text)
         
         # Save to history
-        from app import db, CipherHistory
+        from app import CipherHistory, history_writer
         user_id = get_jwt_identity()
-        history_entry = CipherHistory(
+        history_writer.record([CipherHistory.build_row(
             user_id=user_id,
             cipher_type=cipher_type,
             operation='encode',
             input_text=text,
             output_text=result,
             key_used=key
-        )
-        db.session.add(history_entry)
-        db.session.commit()
+        )])
         
         return jsonify({
             'result': result,
@@ -57,6 +160,10 @@ def encode_text():
         
     except ValueError as e:
         return jsonify({'message': str(e)}), 400
+    except CipherPoolBusyError as e:
+        return jsonify({'message': str(e)}), 503
+    except CipherPoolTimeoutError as e:
+        return jsonify({'message': str(e)}), 504
     except Exception as e:
         from app import db
         db.session.rollback()
@@ -76,36 +183,20 @@ def decode_text():
         cipher_type = data['cipher_type']
         key = data.get('key')
         
-        # Validate cipher type
-        if cipher_type not in CIPHER_FUNCTIONS:
-            return jsonify({'message': f'Unsupported cipher type: {cipher_type}'}), 400
-        
-        cipher_config = CIPHER_FUNCTIONS[cipher_type]
-        
-        # Check if key is required
-        if cipher_config['requires_key'] and not key:
-            return jsonify({'message': f'{cipher_type} cipher requires a key'}), 400
-        
-        # Decode the text
-        decode_func = cipher_config['decode']
-        if cipher_config['requires_key']:
-            result = decode_func(text, key)
-        else:
-            result = decode_func(text)
+        # Validates cipher type and key, then decodes the text
+        result = _run_cipher(cipher_type, 'decode', key, text)
         
         # Save to history
-        from app import db, CipherHistory
+        from app import CipherHistory, history_writer
         user_id = get_jwt_identity()
-        history_entry = CipherHistory(
+        history_writer.record([CipherHistory.build_row(
             user_id=user_id,
             cipher_type=cipher_type,
             operation='decode',
             input_text=text,
             output_text=result,
             key_used=key
-        )
-        db.session.add(history_entry)
-        db.session.commit()
+        )])
         
         return jsonify({
             'result': result,
@@ -115,19 +206,348 @@ def decode_text():
         
     except ValueError as e:
         return jsonify({'message': str(e)}), 400
+    except CipherPoolBusyError as e:
+        return jsonify({'message': str(e)}), 503
+    except CipherPoolTimeoutError as e:
+        return jsonify({'message': str(e)}), 504
     except Exception as e:
         from app import db
         db.session.rollback()
         return jsonify({'message': 'Decoding failed', 'error': str(e)}), 500
 
+@cipher_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_process():
+    """Run a list of encode/decode operations in one request"""
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'A non-empty items list is required'}), 400
+        
+        if len(items) > MAX_BATCH_ITEMS:
+            return jsonify({'message': f'At most {MAX_BATCH_ITEMS} items per batch'}), 400
+        
+        results = [None] * len(items)
+        
+        # Group items sharing cipher, operation and key so each group resolves
+        # its cipher (and the compiled tables behind it) once
+        groups = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not all(k in item for k in ('text', 'cipher_type')):
+                results[index] = {'index': index, 'success': False, 'message': 'Text and cipher_type required'}
+                continue
+            operation = item.get('operation', 'encode')
+            if not all(isinstance(v, str) for v in (item['text'], item['cipher_type'], operation)):
+                results[index] = {'index': index, 'success': False, 'message': 'Text, cipher_type and operation must be strings'}
+                continue
+            key = item.get('key')
+            if key is not None and not isinstance(key, str):
+                key = str(key)
+            group = (item['cipher_type'], operation, key)
+            groups.setdefault(group, []).append(index)
+        
+        from app import CipherHistory, history_writer
+        user_id = get_jwt_identity()
+        history_rows = []
+        
+        for (cipher_type, operation, key), indexes in groups.items():
+            try:
+                func = _resolve_cipher(cipher_type, operation, key)
+            except ValueError as e:
+                for index in indexes:
+                    results[index] = {'index': index, 'success': False, 'message': str(e)}
+                continue
+            
+            # Repeated texts within a group are computed once
+            computed = {}
+            for index in indexes:
+                text = items[index]['text']
+                try:
+                    if text not in computed:
+                        computed[text] = _run_cipher(cipher_type, operation, key, text, func)
+                    result = computed[text]
+                except (ValueError, CipherPoolBusyError, CipherPoolTimeoutError) as e:
+                    results[index] = {'index': index, 'success': False, 'message': str(e)}
+                    continue
+                
+                results[index] = {
+                    'index': index,
+                    'success': True,
+                    'result': result,
+                    'cipher_type': cipher_type,
+                    'operation': operation
+                }
+                history_rows.append(CipherHistory.build_row(
+                    user_id=user_id,
+                    cipher_type=cipher_type,
+                    operation=operation,
+                    input_text=text,
+                    output_text=result,
+                    key_used=key
+                ))
+        
+        # One transaction, one executemany for all history rows
+        history_writer.record(history_rows)
+        
+        succeeded = len(history_rows)
+        return jsonify({
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded
+        }), 200
+        
+    except Exception as e:
+        from app import db
+        db.session.rollback()
+        return jsonify({'message': 'Batch processing failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/crack', methods=['POST'])
+@jwt_required()
+def crack_text():
+    """Try every Caesar or Affine key, or solve a Vigenère or substitution key, and rank the decryptions"""
+    try:
+        data = request.get_json()
+        
+        if not data or not all(k in data for k in ('text', 'cipher_type')):
+            return jsonify({'message': 'Text and cipher_type required'}), 400
+        
+        text = data['text']
+        cipher_type = data['cipher_type']
+        try:
+            top_k = int(data.get('top_k', DEFAULT_TOP_K))
+        except (TypeError, ValueError):
+            return jsonify({'message': 'top_k must be an integer'}), 400
+        if not isinstance(text, str):
+            return jsonify({'message': 'Text must be a string'}), 400
+        
+        if cipher_type in ('vigenere', 'substitution'):
+            return _solver_candidates(cipher_type, text, data, top_k)
+        
+        candidates = crack(text, cipher_type, top_k)
+        
+        return jsonify({
+            'cipher_type': cipher_type,
+            'keys_tried': len(KEY_SPACES[cipher_type]),
+            'candidates': candidates
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except CipherPoolBusyError as e:
+        return jsonify({'message': str(e)}), 503
+    except CipherPoolTimeoutError as e:
+        return jsonify({'message': str(e)}), 504
+    except Exception as e:
+        return jsonify({'message': 'Cracking failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/auto-decode', methods=['POST'])
+@jwt_required()
+def auto_decode_text():
+    """Search for the chain of decoders that turns layered text back into plaintext"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({'message': 'Text required'}), 400
+        if not isinstance(data['text'], str):
+            return jsonify({'message': 'Text must be a string'}), 400
+        
+        max_depth = _int_option(data, 'max_depth', auto_decoder.DEFAULT_MAX_DEPTH, 1, auto_decoder.MAX_DEPTH)
+        top_k = _int_option(data, 'top_k', auto_decoder.DEFAULT_TOP_K, 1, 50)
+        time_budget_ms = _int_option(
+            data, 'time_budget_ms', int(auto_decoder.DEFAULT_TIME_BUDGET * 1000),
+            1, int(auto_decoder.MAX_TIME_BUDGET * 1000)
+        )
+        
+        result = auto_decoder.auto_decode(data['text'], max_depth, time_budget_ms / 1000, top_k)
+        return jsonify(result), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Auto-decode failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/analyze', methods=['POST'])
+@jwt_required()
+def analyze_text():
+    """Letter/n-gram frequencies, IoC, entropy and chi-squared for a text or uploaded file"""
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            # Large files are read and counted chunk by chunk
+            top = _int_option(request.form, 'top', text_stats.DEFAULT_TOP, 1, text_stats.MAX_TOP)
+            chunks = iter(lambda: upload.stream.read(text_stats.DEFAULT_CHUNK_SIZE), b'')
+            return jsonify(text_stats.analyze_chunks(chunks, top)), 200
+        
+        data = request.get_json()
+        if not data or 'text' not in data:
+            return jsonify({'message': 'Text or file required'}), 400
+        if not isinstance(data['text'], str):
+            return jsonify({'message': 'Text must be a string'}), 400
+        
+        text = data['text']
+        top = _int_option(data, 'top', text_stats.DEFAULT_TOP, 1, text_stats.MAX_TOP)
+        if not data.get('compare'):
+            return jsonify(text_stats.analyze(text, top)), 200
+        
+        # Side by side statistics of the text and its encoded (or decoded) form
+        if 'cipher_type' not in data:
+            return jsonify({'message': 'cipher_type required for comparison'}), 400
+        cipher_type = data['cipher_type']
+        operation = data.get('operation', 'encode')
+        key = data.get('key')
+        output = _run_cipher(cipher_type, operation, key, text)
+        
+        return jsonify({
+            'cipher_type': cipher_type,
+            'operation': operation,
+            'input': text_stats.analyze(text, top),
+            'output': text_stats.analyze(output, top)
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except CipherPoolBusyError as e:
+        return jsonify({'message': str(e)}), 503
+    except CipherPoolTimeoutError as e:
+        return jsonify({'message': str(e)}), 504
+    except Exception as e:
+        return jsonify({'message': 'Analysis failed', 'error': str(e)}), 500
+
+def _live_session_or_404(session_id):
+    from app import live_sessions
+    session = live_sessions.get(session_id, get_jwt_identity())
+    if session is None:
+        return None, (jsonify({'message': 'Live session not found'}), 404)
+    return session, None
+
+@cipher_bp.route('/live', methods=['POST'])
+@jwt_required()
+def start_live_session():
+    """Open a live-typing session; later edits are re-encoded incrementally"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'cipher_type' not in data:
+            return jsonify({'message': 'cipher_type required'}), 400
+        
+        text = data.get('text', '')
+        if not isinstance(text, str):
+            return jsonify({'message': 'Text must be a string'}), 400
+        cipher_type = data['cipher_type']
+        operation = data.get('operation', 'encode')
+        key = data.get('key')
+        func = _resolve_cipher(cipher_type, operation, key)
+        
+        from app import live_sessions
+        session = live_sessions.create(get_jwt_identity(), cipher_type, operation, key, func, text)
+        
+        return jsonify({
+            'session_id': session.id,
+            'result': session.result,
+            'cipher_type': cipher_type,
+            'operation': operation,
+            'incremental': session.strategy != 'full'
+        }), 201
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Live session failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/live/<session_id>', methods=['PUT'])
+@jwt_required()
+def update_live_session(session_id):
+    """Replace the session text; returns the new result and the patch from the previous one"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({'message': 'Text required'}), 400
+        if not isinstance(data['text'], str):
+            return jsonify({'message': 'Text must be a string'}), 400
+        
+        session, error = _live_session_or_404(session_id)
+        if error:
+            return error
+        
+        from app import live_sessions
+        patch, result = live_sessions.update(session, data['text'])
+        response = {'patch': patch}
+        # Clients that apply patches can skip the full result
+        if not data.get('patch_only'):
+            response['result'] = result
+        return jsonify(response), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Live session failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/live/<session_id>/commit', methods=['POST'])
+@jwt_required()
+def commit_live_session(session_id):
+    """Save the final text of a session to history and close it"""
+    try:
+        session, error = _live_session_or_404(session_id)
+        if error:
+            return error
+        
+        from app import CipherHistory, history_writer, live_sessions
+        with session.lock:
+            text, result = session.text, session.result
+        live_sessions.close(session.id, committed=True)
+        if text:
+            history_writer.record([CipherHistory.build_row(
+                user_id=session.user_id,
+                cipher_type=session.cipher_type,
+                operation=session.operation,
+                input_text=text,
+                output_text=result,
+                key_used=session.key
+            )])
+        
+        return jsonify({
+            'result': result,
+            'cipher_type': session.cipher_type,
+            'operation': session.operation,
+            'updates': session.updates
+        }), 200
+        
+    except Exception as e:
+        from app import db
+        db.session.rollback()
+        return jsonify({'message': 'Commit failed', 'error': str(e)}), 500
+
+@cipher_bp.route('/live/<session_id>', methods=['DELETE'])
+@jwt_required()
+def discard_live_session(session_id):
+    """Close a session without saving it"""
+    session, error = _live_session_or_404(session_id)
+    if error:
+        return error
+    
+    from app import live_sessions
+    live_sessions.close(session.id)
+    return jsonify({'message': 'Live session discarded'}), 200
+
 @cipher_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_history():
-    """Get cipher operation history for current user"""
+    """Get cipher operation history for current user.
+
+    Pass ``after`` (empty for the first page, then the returned
+    ``next_cursor``) for keyset pagination, which costs the same at any
+    depth. Without it the page/offset mode is used. ``include_total=false``
+    skips the COUNT query in either mode.
+    """
     try:
         user_id = get_jwt_identity()
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
+        after = request.args.get('after')
         
         # Validate pagination parameters
         if page < 1:
@@ -135,26 +555,134 @@ def get_history():
         if limit < 1 or limit > 100:
             limit = 10
         
-        # Query history with pagination
-        from app import CipherHistory
-        history_query = CipherHistory.query.filter_by(user_id=user_id).order_by(
-            CipherHistory.timestamp.desc()
+        # The exact total is optional in cursor mode and opt-out in page mode
+        default_total = 'false' if after is not None else 'true'
+        include_total = request.args.get('include_total', default_total).lower() in ('1', 'true', 'yes')
+        
+        # Query history, newest first (matches ix_cipher_history_user_keyset)
+        from app import CipherHistory, HistoryBlob, HISTORY_PREVIEW_LENGTH
+        history_query = CipherHistory.query.filter_by(user_id=user_id)
+        total = history_query.count() if include_total else None
+        
+        # Full texts are never loaded; previews come from the blob rows
+        # (or the inline columns for rows not yet migrated)
+        input_blob = aliased(HistoryBlob)
+        output_blob = aliased(HistoryBlob)
+        ordered = history_query.options(
+            defer(CipherHistory._input_text),
+            defer(CipherHistory._output_text)
+        ).outerjoin(
+            input_blob, input_blob.hash == CipherHistory.input_hash
+        ).outerjoin(
+            output_blob, output_blob.hash == CipherHistory.output_hash
+        ).add_columns(
+            func.coalesce(input_blob.preview, func.substr(CipherHistory._input_text, 1, HISTORY_PREVIEW_LENGTH)),
+            func.coalesce(output_blob.preview, func.substr(CipherHistory._output_text, 1, HISTORY_PREVIEW_LENGTH))
+        ).order_by(
+            CipherHistory.timestamp.desc(),
+            CipherHistory.id.desc()
         )
         
-        total = history_query.count()
-        history_items = history_query.offset((page - 1) * limit).limit(limit).all()
+        if after is not None:
+            if after:
+                try:
+                    timestamp, last_id = _decode_history_cursor(after)
+                except ValueError:
+                    return jsonify({'message': 'Invalid cursor'}), 400
+                # Row-value comparison, so the index serves it as one range seek
+                ordered = ordered.filter(
+                    tuple_(CipherHistory.timestamp, CipherHistory.id) < tuple_(timestamp, last_id)
+                )
+            
+            # One extra row tells us whether another page exists
+            history_rows = ordered.limit(limit + 1).all()
+            has_more = len(history_rows) > limit
+            history_rows = history_rows[:limit]
+            
+            response = {
+                'history': [item.to_summary_dict(*previews) for item, *previews in history_rows],
+                'limit': limit,
+                'has_more': has_more,
+                'next_cursor': _encode_history_cursor(history_rows[-1][0]) if has_more else None
+            }
+            if include_total:
+                response['total'] = total
+            return jsonify(response), 200
         
-        return jsonify({
-            'history': [item.to_dict() for item in history_items],
-            'total': total,
+        history_rows = ordered.offset((page - 1) * limit).limit(limit).all()
+        
+        response = {
+            'history': [item.to_summary_dict(*previews) for item, *previews in history_rows],
             'page': page,
-            'limit': limit,
-            'pages': (total + limit - 1) // limit
-        }), 200
+            'limit': limit
+        }
+        if include_total:
+            response['total'] = total
+            response['pages'] = (total + limit - 1) // limit
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to get history', 'error': str(e)}), 500
 
+@cipher_bp.route('/history/<int:history_id>', methods=['GET'])
+@jwt_required()
+def get_history_item(history_id):
+    """Get a single history item with its full texts"""
+    try:
+        user_id = get_jwt_identity()
+        
+        from app import CipherHistory
+        history_item = CipherHistory.query.filter_by(
+            id=history_id,
+            user_id=user_id
+        ).first()
+        
+        if not history_item:
+            return jsonify({'message': 'History item not found'}), 404
+        
+        return jsonify(history_item.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to get history item', 'error': str(e)}), 500
+
+@cipher_bp.route('/history/<int:history_id>/download', methods=['GET'])
+@jwt_required()
+def download_history_item(history_id):
+    """Stream the input or output text of a history item as a file"""
+    field = request.args.get('field', 'output')
+    if field not in ('input', 'output'):
+        return jsonify({'message': "field must be 'input' or 'output'"}), 400
+    
+    user_id = get_jwt_identity()
+    from app import CipherHistory, HistoryBlob
+    column = getattr(CipherHistory, f'_{field}_text')
+    found = CipherHistory.query.with_entities(
+        func.length(column), getattr(CipherHistory, f'{field}_hash')
+    ).filter_by(
+        id=history_id,
+        user_id=user_id
+    ).first()
+    
+    if found is None:
+        return jsonify({'message': 'History item not found'}), 404
+    inline_length, digest = found
+    
+    def generate():
+        # Read the text in slices so it is never held in memory at once
+        if inline_length or digest is None:
+            for start in range(1, inline_length + 1, HISTORY_DOWNLOAD_CHUNK):
+                yield CipherHistory.query.with_entities(
+                    func.substr(column, start, HISTORY_DOWNLOAD_CHUNK)
+                ).filter_by(id=history_id).scalar()
+        else:
+            yield from HistoryBlob.iter_text(digest)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/plain; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename=history-{history_id}-{field}.txt'}
+    )
+
 @cipher_bp.route('/history/<int:history_id>', methods=['DELETE'])
 @jwt_required()
 def delete_history_item(history_id):
@@ -172,8 +700,12 @@ def delete_history_item(history_id):
         if not history_item:
             return jsonify({'message': 'History item not found'}), 404
         
-        # Delete the item
+        # Delete the item, then any texts only it referenced
+        from app import HistoryBlob
+        digests = [history_item.input_hash, history_item.output_hash]
         db.session.delete(history_item)
+        db.session.flush()
+        HistoryBlob.prune(digests)
         db.session.commit()
         
         return jsonify({'message': 'History item deleted successfully'}), 200
@@ -190,10 +722,9 @@ def clear_history():
     try:
         user_id = get_jwt_identity()
         
-        # Delete all history items for the user
-        from app import db, CipherHistory
-        deleted_count = CipherHistory.query.filter_by(user_id=user_id).delete()
-        db.session.commit()
+        # Delete all history items for the user in short chunked transactions
+        from app import CipherHistory
+        deleted_count = CipherHistory.delete_for_user(user_id)
         
         return jsonify({
             'message': f'Cleared {deleted_count} history items',
@@ -205,13 +736,13 @@ def clear_history():
         db.session.rollback()
         return jsonify({'message': 'Failed to clear history', 'error': str(e)}), 500
 
+# CIPHER_FUNCTIONS is fixed at import, so the body is built once
+_CIPHER_TYPES = StaticJSON({
+    cipher_type: {'requires_key': config['requires_key']}
+    for cipher_type, config in CIPHER_FUNCTIONS.items()
+})
+
 @cipher_bp.route('/types', methods=['GET'])
 def get_cipher_types():
     """Get available cipher types and their requirements"""
-    cipher_info = {}
-    for cipher_type, config in CIPHER_FUNCTIONS.items():
-        cipher_info[cipher_type] = {
-            'requires_key': config['requires_key']
-        }
-    
-    return jsonify(cipher_info), 200
\ No newline at end of file
+    return _CIPHER_TYPES.response()
@@ -1,20 +1,37 @@
+import hashlib
+import json
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.ciphers import CIPHER_FUNCTIONS
 
 favorites_bp = Blueprint('favorites', __name__)
 
-VALID_CIPHERS = {
-    'affine','atbash','base64','binary','caesar','hex','morse','rail_fence','rot13','vigenere'
-}
+def _current_user_id():
+    return int(get_jwt_identity())
+
+def _load_favorites(user_id):
+    """The user's favorites, newest first, with an ETag over their contents"""
+    from app import Favorite
+    favs = Favorite.query.filter_by(user_id=user_id).order_by(Favorite.created_at.desc()).all()
+    favorites = [f.to_dict() for f in favs]
+    body = json.dumps(favorites, sort_keys=True, separators=(',', ':')).encode()
+    return {'favorites': favorites, 'etag': hashlib.sha256(body).hexdigest()[:32]}
 
 @favorites_bp.route('', methods=['GET'])
 @jwt_required()
 def list_favorites():
     try:
-        user_id = get_jwt_identity()
-        from app import Favorite
-        favs = Favorite.query.filter_by(user_id=user_id).order_by(Favorite.created_at.desc()).all()
-        return jsonify({'favorites':[f.to_dict() for f in favs]}), 200
+        user_id = _current_user_id()
+        from app import favorites_cache
+        cached = favorites_cache.get(user_id, lambda: _load_favorites(user_id))
+        
+        # Per user, and revalidated on every use
+        headers = {'ETag': f'"{cached["etag"]}"', 'Cache-Control': 'private, no-cache'}
+        if cached['etag'] in request.if_none_match:
+            return '', 304, headers
+        return jsonify({'favorites': cached['favorites']}), 200, headers
     except Exception as e:
         return jsonify({'message':'Failed to fetch favorites','error':str(e)}), 500
 
@@ -24,16 +41,24 @@ def add_favorite():
     try:
         data = request.get_json() or {}
         cipher_type = data.get('cipher_type')
-        if cipher_type not in VALID_CIPHERS:
+        if cipher_type not in CIPHER_FUNCTIONS:
             return jsonify({'message':'Invalid cipher type'}), 400
-        from app import db, Favorite
-        user_id = get_jwt_identity()
-        existing = Favorite.query.filter_by(user_id=user_id, cipher_type=cipher_type).first()
-        if existing:
-            return jsonify({'message':'Already in favorites','favorite': existing.to_dict()}), 200
-        fav = Favorite(user_id=user_id, cipher_type=cipher_type)
-        db.session.add(fav)
+        from app import db, Favorite, favorites_cache, insert_ignore
+        user_id = _current_user_id()
+        # One statement; the unique (user_id, cipher_type) index turns a repeat into a no-op
+        inserted = insert_ignore(
+            Favorite, ['user_id', 'cipher_type'],
+            [{'user_id': user_id, 'cipher_type': cipher_type, 'created_at': datetime.utcnow()}],
+            returning=(Favorite.id, Favorite.cipher_type, Favorite.created_at)
+        )
         db.session.commit()
+        
+        if not inserted:
+            existing = Favorite.query.filter_by(user_id=user_id, cipher_type=cipher_type).first()
+            return jsonify({'message':'Already in favorites','favorite': existing.to_dict()}), 200
+        favorites_cache.invalidate(user_id)
+        [inserted] = inserted
+        fav = Favorite(id=inserted.id, cipher_type=inserted.cipher_type, created_at=inserted.created_at)
         return jsonify({'message':'Added to favorites','favorite': fav.to_dict()}), 201
     except Exception as e:
         from app import db
@@ -44,15 +69,17 @@ def add_favorite():
 @jwt_required()
 def delete_favorite(cipher_type):
     try:
-        user_id = get_jwt_identity()
-        from app import db, Favorite
-        fav = Favorite.query.filter_by(user_id=user_id, cipher_type=cipher_type).first()
-        if not fav:
-            return jsonify({'message':'Favorite not found'}), 404
-        db.session.delete(fav)
+        user_id = _current_user_id()
+        from app import db, Favorite, favorites_cache
+        deleted = db.session.execute(
+            db.delete(Favorite).where(Favorite.user_id == user_id, Favorite.cipher_type == cipher_type)
+        ).rowcount
         db.session.commit()
+        if not deleted:
+            return jsonify({'message':'Favorite not found'}), 404
+        favorites_cache.invalidate(user_id)
         return jsonify({'message':'Removed from favorites'}), 200
     except Exception as e:
         from app import db
         db.session.rollback()
-        return jsonify({'message':'Failed to remove favorite','error':str(e)}), 500
\ No newline at end of file
+        return jsonify({'message':'Failed to remove favorite','error':str(e)}), 500
@@ -10,6 +10,7 @@ from minecipher.constants import (
     LAUNCH_COMMAND,
     OVERVIEW,
 )
+from utils.static_response import StaticJSON
 
 game_bp = Blueprint('game', __name__)
 
@@ -17,7 +18,7 @@ game_bp = Blueprint('game', __name__)
 @jwt_required()
 def game_status():
     """Return placeholder info for game page"""
-    from app import User  # <-- 👈 Add this here
+    from app import get_user_record
 
     user_id = get_jwt_identity()
     if user_id is None:
@@ -27,13 +28,13 @@ def game_status():
     except (TypeError, ValueError):
         return jsonify({'message': 'Invalid token subject (must be numeric)'}), 401
 
-    user = User.query.get(user_id)
+    user = get_user_record(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
     return jsonify({
         'message': 'Game page connected',
-        'user': user.to_dict(),
+        'user': user,
         'game': {
             'status': 'ready',
             'info': 'This is a placeholder for Minesweeper'
@@ -41,9 +42,7 @@ def game_status():
     })
 
 
-@game_bp.route('/minecipher', methods=['GET'])
-@jwt_required()
-def minecipher_info():
+def _minecipher_payload():
     difficulties = []
     for name, (rows, cols) in DIFFICULTY_PRESETS.items():
         difficulties.append({
@@ -60,7 +59,7 @@ def minecipher_info():
             'example': info.get('example', ''),
         })
 
-    return jsonify({
+    return {
         'message': 'MineCipher metadata',
         'minecipher': {
             'overview': OVERVIEW,
@@ -70,7 +69,17 @@ def minecipher_info():
             'difficulties': difficulties,
             'ciphers': ciphers,
         }
-    })
+    }
+
+
+# The constants only change on deploy, so the body is built once
+_MINECIPHER_INFO = StaticJSON(_minecipher_payload(), private=True)
+
+
+@game_bp.route('/minecipher', methods=['GET'])
+@jwt_required()
+def minecipher_info():
+    return _MINECIPHER_INFO.response()
 
 
 @game_bp.route('/minecipher', methods=['OPTIONS'])
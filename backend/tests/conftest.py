@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix='codecrypt-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_DB_DIR, 'test.db')
+# Keep cipher work in-process and password hashing cheap
+os.environ['CIPHER_OFFLOAD_THRESHOLD'] = '0'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['HISTORY_WRITE_BEHIND'] = 'false'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def drop_everything(db):
+    """Drop every table, including ones the models no longer know about"""
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        names = [row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        for name in names:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}"')
+        conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+
+@pytest.fixture(scope='session')
+def backend():
+    import app as backend_app
+    return backend_app
+
+
+@pytest.fixture
+def fresh_db(backend):
+    with backend.app.app_context():
+        backend.db.session.remove()
+        drop_everything(backend.db)
+        backend.db.create_all()
+        backend.upgrade_schema()
+    backend.user_cache.clear()
+    backend.favorites_cache.clear()
+    yield backend.db
+    with backend.app.app_context():
+        backend.db.session.remove()
+
+
+@pytest.fixture
+def client(backend, fresh_db):
+    return backend.app.test_client()
+
+
+def register(client, username='alice', email='alice@example.com', password='secret1'):
+    response = client.post('/api/auth/register', json={'username': username, 'email': email, 'password': password})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def auth_headers(client):
+    return {'Authorization': 'Bearer ' + register(client)['token']}
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from conftest import register
+from routes.auth import _conflict_message
+from utils.password_hasher import PasswordHasher
+
+
+def test_hasher_admission_stays_below_server_threads():
+    for threads in (1, 2, 4, 8, 16):
+        hasher = PasswordHasher(server_threads=threads, max_pending=64)
+        assert hasher.max_pending < threads or threads == 1
+        assert hasher.workers <= hasher.max_pending
+        hasher.shutdown()
+
+
+def test_saturated_hasher_fails_fast_while_other_routes_respond(backend, client, monkeypatch):
+    register(client)
+    hasher = PasswordHasher(
+        method='pbkdf2:sha256:1000', queue_timeout=0.05,
+        server_threads=backend.app.config['SERVER_THREADS'],
+    )
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    verify = hasher._verify
+
+    def blocking_verify(pwhash, password):
+        started.release()
+        release.wait(10)
+        return verify(pwhash, password)
+
+    monkeypatch.setattr(hasher, '_verify', blocking_verify)
+    monkeypatch.setattr(backend, 'password_hasher', hasher)
+
+    credentials = {'email': 'alice@example.com', 'password': 'secret1'}
+    statuses = []
+    def login():
+        statuses.append(backend.app.test_client().post('/api/auth/login', json=credentials).status_code)
+
+    # Fill every admission slot with a login stuck in the hash
+    blocked = [threading.Thread(target=login) for _ in range(hasher.max_pending)]
+    for thread in blocked:
+        thread.start()
+    for _ in range(hasher.workers):
+        assert started.acquire(timeout=5)
+    deadline = time.monotonic() + 5
+    while hasher.stats()['pending'] < hasher.max_pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+    try:
+        response = client.post('/api/auth/login', json=credentials)
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+        assert client.get('/api/cipher/types').status_code == 200
+    finally:
+        release.set()
+        for thread in blocked:
+            thread.join(10)
+        hasher.shutdown()
+    assert statuses == [200] * hasher.max_pending
+    assert hasher.stats()['rejected'] == 1
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('UNIQUE constraint failed: users.email', 'Email already registered'),
+    ('duplicate key value violates unique constraint "users_email_key"\n'
+     'DETAIL:  Key (email)=(users_username@example.com) already exists.', 'Email already registered'),
+    ('duplicate key value violates unique constraint "users_username_key"', 'Username already taken'),
+    ('duplicate key value violates unique constraint "ix_users_username"', 'Username already taken'),
+])
+def test_conflict_message_names_the_column(message, expected):
+    error = IntegrityError('INSERT INTO users ...', {}, Exception(message))
+    assert _conflict_message(error, None, None) == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from utils.cipher_parallel import SPLITTABLE, parallel_transform
+from utils.cipher_pool import CipherPool
+from utils.ciphers import CIPHER_FUNCTIONS
+
+KEYS = {
+    'caesar': '7',
+    'affine': '5,8',
+    'substitution': 'QWERTYUIOPASDFGHJKLZXCVBNM',
+    'vigenere': 'LEMON',
+}
+TEXT = 'Attack at dawn, café Ünïcode 中文 😀!\nSecond line: The Quick Brown Fox 42. ' * 9
+
+
+def _case(cipher_type, operation):
+    key = KEYS.get(cipher_type)
+    text = TEXT
+    if operation == 'decode':
+        source = TEXT.upper() if cipher_type == 'morse' else TEXT
+        text = CIPHER_FUNCTIONS[cipher_type]['encode'](*((source, key) if key else (source,)))
+    serial = CIPHER_FUNCTIONS[cipher_type][operation](*((text, key) if key else (text,)))
+    return key, text, serial
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = CipherPool(threshold=1, workers=2, chunk_size=13)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize('cipher_type, operation', sorted(SPLITTABLE))
+@pytest.mark.parametrize('chunk_size', [1, 7, 64])
+def test_parallel_transform_matches_serial(cipher_type, operation, chunk_size):
+    key, text, serial = _case(cipher_type, operation)
+    assert parallel_transform(cipher_type, operation, key, text, chunk_size=chunk_size) == serial
+
+
+@pytest.mark.parametrize('cipher_type, operation', sorted(SPLITTABLE))
+def test_pool_run_matches_serial(pool, cipher_type, operation):
+    key, text, serial = _case(cipher_type, operation)
+    assert pool.run(cipher_type, operation, key, text) == serial
+
+
+def test_pool_runs_unsplittable_ciphers_whole(pool):
+    text = 'WE ARE DISCOVERED, FLEE AT ONCE. ' * 5
+    assert pool.run('rail_fence', 'encode', '3', text) == CIPHER_FUNCTIONS['rail_fence']['encode'](text, '3')
+    assert pool.stats()['pending'] == 0
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from utils.cipher_stream import open_stream
+from utils.ciphers import CIPHER_FUNCTIONS
+
+
+def _streamed(cipher_type, operation, text, size):
+    chunks = [text[start:start + size] for start in range(0, len(text), size)]
+    return ''.join(open_stream(cipher_type, operation).transform(chunks))
+
+
+def _outcome(fn):
+    try:
+        return fn()
+    except ValueError as error:
+        return ('error', str(error))
+
+
+def _hex(data):
+    return data.hex()
+
+
+def _binary(values, width=8):
+    return ' '.join(format(value, f'0{width}b') for value in values)
+
+
+LEGACY_PAYLOADS = [
+    b'plain ascii',
+    'café 中文'.encode('utf-8'),
+    b'caf\xe9',                       # Latin-1 from before UTF-8
+    b'ascii first then caf\xe9 ok',
+    b'\xe9 at the start',
+    'cut 中'.encode('utf-8')[:-1],  # truncated sequence at the end
+]
+
+
+def _streamed_reference(payload):
+    """UTF-8 up to the first invalid sequence, Latin-1 from there on"""
+    try:
+        return payload.decode('utf-8')
+    except UnicodeDecodeError as error:
+        return payload[:error.start].decode('utf-8') + payload[error.start:].decode('latin-1')
+
+
+@pytest.mark.parametrize('payload', LEGACY_PAYLOADS)
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 64])
+def test_hex_decode_stream_matches_one_shot(payload, size):
+    text = _hex(payload)
+    expected = _outcome(lambda: CIPHER_FUNCTIONS['hex']['decode'](text))
+    assert _outcome(lambda: _streamed('hex', 'decode', text, size)) == expected
+
+
+@pytest.mark.parametrize('payload', LEGACY_PAYLOADS)
+@pytest.mark.parametrize('size', [1, 4, 9, 64])
+def test_binary_decode_stream_matches_one_shot(payload, size):
+    text = _binary(payload)
+    expected = _outcome(lambda: CIPHER_FUNCTIONS['binary']['decode'](text))
+    assert _outcome(lambda: _streamed('binary', 'decode', text, size)) == expected
+
+
+@pytest.mark.parametrize('text', [
+    _binary([ord(char) for char in 'legacy 中文'], width=16),   # one group per code point
+    _binary(b'ab') + ' ' + _binary([0x4e2d], width=16),
+    '1000001 1100010 11101001',                                        # short groups
+    '01000001 0b101',
+    '01000001 -1',
+    '01000001 12',
+])
+@pytest.mark.parametrize('size', [1, 5, 64])
+def test_binary_decode_stream_fallbacks(text, size):
+    expected = _outcome(lambda: CIPHER_FUNCTIONS['binary']['decode'](text))
+    assert _outcome(lambda: _streamed('binary', 'decode', text, size)) == expected
+
+
+def test_random_legacy_payloads():
+    rng = random.Random(5)
+    for _ in range(200):
+        payload = bytes(rng.choice([rng.randrange(128), rng.randrange(256)]) for _ in range(rng.randrange(40)))
+        for cipher_type, text in (('hex', _hex(payload)), ('binary', _binary(payload))):
+            size = rng.randrange(1, 20)
+            assert _streamed(cipher_type, 'decode', text, size) == _streamed_reference(payload)
+
+
+@pytest.mark.parametrize('size', [1, 3, 64])
+def test_valid_utf8_before_an_invalid_byte_is_kept(size):
+    payload = 'valid é then '.encode('utf-8') + b'\xff caf\xe9'
+    assert _streamed('hex', 'decode', _hex(payload), size) == 'valid é then \xff caf\xe9'
+    assert _streamed('binary', 'decode', _binary(payload), size) == 'valid é then \xff caf\xe9'
+
+
+@pytest.mark.parametrize('cipher_type, encode', [('hex', _hex), ('binary', _binary)])
+def test_non_ascii_decode_streams_as_it_goes(cipher_type, encode):
+    text = encode(('中文' * 5000).encode('utf-8'))
+    chunks = [text[start:start + 4096] for start in range(0, len(text), 4096)]
+    stream = open_stream(cipher_type, 'decode')
+    outputs = [stream.update(chunk) for chunk in chunks]
+    assert all(outputs)
+    assert ''.join(outputs) + stream.finalize() == '中文' * 5000
@@ -0,0 +1,70 @@
+import pytest
+
+from utils import ciphers
+from utils.ciphers import CipherAlgorithms
+
+
+def _zigzag(text, rails):
+    rows = [[] for _ in range(rails)]
+    rail, step = 0, 1
+    for char in text:
+        rows[rail].append(char)
+        if rail == 0:
+            step = 1
+        elif rail == rails - 1:
+            step = -1
+        rail += step
+    return ''.join(''.join(row) for row in rows)
+
+
+@pytest.mark.parametrize('length', [2, 3, 7, 50, 1001])
+@pytest.mark.parametrize('rails', [2, 3, 4, 9, 1000])
+def test_rail_fence_matches_zigzag(length, rails):
+    text = ''.join(chr(0x41 + n % 26) if n % 5 else '\U0001f600' for n in range(length))
+    encoded = CipherAlgorithms.rail_fence_encode(text, rails)
+    if 1 < rails < length:
+        assert encoded == _zigzag(text, rails)
+    assert CipherAlgorithms.rail_fence_decode(encoded, rails) == text
+
+
+def test_long_rail_fence_permutations_are_not_cached():
+    pytest.importorskip('numpy')
+    ciphers._cached_rail_fence_permutation.cache_clear()
+    text = 'WEAREDISCOVERED' * (ciphers.PERMUTATION_CACHE_MAX_LENGTH // 15 + 1)
+
+    encoded = CipherAlgorithms.rail_fence_encode(text, 5)
+    assert encoded == _zigzag(text, 5)
+    assert CipherAlgorithms.rail_fence_decode(encoded, 5) == text
+    assert ciphers._cached_rail_fence_permutation.cache_info().currsize == 0
+
+    CipherAlgorithms.rail_fence_encode(text[:1000], 5)
+    assert ciphers._cached_rail_fence_permutation.cache_info().currsize == 1
+
+
+@pytest.mark.parametrize('rails', [2, 3, 6, 99])
+def test_rail_fence_without_numpy_matches_zigzag(monkeypatch, rails):
+    monkeypatch.setattr(ciphers, 'np', None)
+    text = 'ZIGZAGé\U0001f600' * 13
+    encoded = CipherAlgorithms.rail_fence_encode(text, rails)
+    assert encoded == _zigzag(text, rails)
+    assert CipherAlgorithms.rail_fence_decode(encoded, rails) == text
+
+
+def test_affine_tables_do_not_grow_with_input():
+    text = ''.join(map(chr, range(0x80, 0x3000))) + 'Hello, Wörld'
+    table = ciphers._affine_table(1, 3)
+    expected = ''.join(chr(table._map(ord(char))) for char in text)
+
+    assert CipherAlgorithms.caesar_encode(text, 3) == expected
+    assert max(table) < ciphers.AFFINE_MEMO_LIMIT
+    assert all(chr(code).isalpha() for code in table if code >= 128)
+
+
+def test_long_vigenere_keys_are_not_cached():
+    ciphers._cached_vigenere_schedule.cache_clear()
+    long_key = 'LEMON' * 1000
+    encoded = CipherAlgorithms.vigenere_encode('ATTACK AT DAWN', long_key)
+    assert ciphers._cached_vigenere_schedule.cache_info().currsize == 0
+
+    assert encoded == CipherAlgorithms.vigenere_encode('ATTACK AT DAWN', 'LEMON')
+    assert ciphers._cached_vigenere_schedule.cache_info().currsize == 1
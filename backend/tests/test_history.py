@@ -0,0 +1,147 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+
+def _add_history(backend, user_id, count):
+    base = datetime(2024, 1, 1)
+    rows = [
+        # Pairs of rows share a timestamp so ties are ordered by id
+        backend.CipherHistory.build_row(user_id, 'rot13', 'encode', f'text {n}', f'grkg {n}')
+        | {'timestamp': base + timedelta(seconds=n // 2)}
+        for n in range(count)
+    ]
+    with backend.app.app_context():
+        backend.insert_history_rows(rows)
+        backend.db.session.commit()
+
+
+def test_keyset_pages_cover_history_in_order(backend, client, auth_headers):
+    _add_history(backend, 1, 25)
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get(f'/api/cipher/history?after={cursor}&limit=7', headers=auth_headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        seen.extend((item['timestamp'], item['id']) for item in body['history'])
+        if not body['has_more']:
+            break
+        cursor = body['next_cursor']
+    assert len(seen) == 25
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_keyset_page_is_an_index_range_seek(backend, client, auth_headers):
+    _add_history(backend, 1, 30)
+    cursor = client.get('/api/cipher/history?after=&limit=5', headers=auth_headers).get_json()['next_cursor']
+
+    statements = []
+    def capture(conn, cursor_, statement, parameters, context, executemany):
+        if 'FROM cipher_history' in statement and 'LIMIT' in statement:
+            statements.append((statement, parameters))
+    with backend.app.app_context():
+        engine = backend.db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            assert client.get(f'/api/cipher/history?after={cursor}&limit=5', headers=auth_headers).status_code == 200
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        statement, parameters = statements[-1]
+        with engine.connect() as conn:
+            plan = ' '.join(row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+    assert 'ix_cipher_history_user_keyset' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_write_behind_drops_only_rows_that_fail(backend, client, auth_headers):
+    from utils.history_writer import HistoryWriter
+
+    writer = HistoryWriter(backend.app, backend.db, backend.insert_history_rows)
+    writer.enabled = True
+    writer.flush_interval = 5
+    rows = [
+        backend.CipherHistory.build_row(user_id, 'rot13', 'encode', f'text {n}', f'grkg {n}')
+        # User 999 does not exist, so its row violates the foreign key
+        for n, user_id in enumerate([1, 1, 999, 1, 1, 1, 1])
+    ]
+    writer.record(rows)
+    writer.shutdown()
+
+    stats = writer.stats()
+    assert stats['written'] == 6
+    assert stats['failed'] == 1
+    assert stats['retried_batches'] >= 1
+    with backend.app.app_context():
+        assert backend.CipherHistory.query.filter_by(user_id=1).count() == 6
+
+
+def test_write_behind_keeps_the_operation_time(backend, client, auth_headers):
+    from utils.history_writer import HistoryWriter
+
+    writer = HistoryWriter(backend.app, backend.db, backend.insert_history_rows)
+    writer.enabled = True
+    writer.flush_interval = 5
+    row = backend.CipherHistory.build_row(1, 'rot13', 'encode', 'text', 'grkg')
+    recorded_at = row['timestamp']
+    time.sleep(0.05)
+    writer.record([row])
+    writer.shutdown()
+
+    with backend.app.app_context():
+        assert backend.CipherHistory.query.one().timestamp == recorded_at
+
+
+def test_constructed_rows_store_texts_as_blobs(backend, auth_headers):
+    with backend.app.app_context():
+        for _ in range(2):
+            backend.db.session.add(backend.CipherHistory(1, 'rot13', 'encode', 'shared text', 'funerq grkg'))
+        backend.db.session.commit()
+
+        rows = backend.CipherHistory.query.all()
+        assert [(row._input_text, row._output_text) for row in rows] == [('', ''), ('', '')]
+        assert [row.input_text for row in rows] == ['shared text', 'shared text']
+        assert backend.HistoryBlob.query.count() == 2
+
+
+def test_insert_fallback_skips_conflicts_under_a_savepoint(backend, auth_headers):
+    with backend.app.app_context():
+        favorite = {'user_id': 1, 'cipher_type': 'caesar', 'created_at': datetime(2024, 1, 1)}
+        inserted = backend._insert_each_ignoring_conflicts(
+            backend.Favorite, [favorite, favorite | {'cipher_type': 'rot13'}, favorite],
+            returning=(backend.Favorite.cipher_type,)
+        )
+        backend.db.session.commit()
+
+        assert [row.cipher_type for row in inserted] == ['caesar', 'rot13']
+        assert sorted(fav.cipher_type for fav in backend.Favorite.query.filter_by(user_id=1)) == ['caesar', 'rot13']
+
+
+def test_prune_keeps_referenced_blobs(backend, auth_headers):
+    _add_history(backend, 1, 2)
+    with backend.app.app_context():
+        kept = backend.CipherHistory.query.first()
+        backend.db.session.execute(backend.db.insert(backend.HistoryBlob), [
+            backend.HistoryBlob.build_row(backend.text_digest('orphan'), 'orphan')
+        ])
+        backend.HistoryBlob.prune([kept.input_hash, kept.output_hash, backend.text_digest('orphan')])
+        backend.db.session.commit()
+
+        assert backend.db.session.get(backend.HistoryBlob, backend.text_digest('orphan')) is None
+        assert sorted(row.input_text for row in backend.CipherHistory.query) == ['text 0', 'text 1']
+
+
+def test_missing_blob_raises_instead_of_reading_empty(backend, auth_headers):
+    _add_history(backend, 1, 1)
+    with backend.app.app_context():
+        with backend.db.engine.begin() as conn:
+            conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            conn.exec_driver_sql('DELETE FROM history_blobs')
+            conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+        row = backend.CipherHistory.query.one()
+        with pytest.raises(LookupError):
+            row.input_text
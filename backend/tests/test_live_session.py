@@ -0,0 +1,33 @@
+from utils.live_session import LiveSessionStore
+
+
+def _open(store, user_id):
+    return store.create(user_id, 'rot13', 'encode', None, str.upper)
+
+
+def test_per_user_cap_evicts_that_users_oldest_session():
+    store = LiveSessionStore(max_sessions=100, ttl=60, max_per_user=3)
+    other = _open(store, 2)
+    first, second, third = (_open(store, 1) for _ in range(3))
+    store.get(first.id, 1)  # now the most recently used
+
+    fourth = _open(store, 1)
+
+    assert store.get(second.id, 1) is None
+    assert all(store.get(s.id, 1) is s for s in (first, third, fourth))
+    assert store.get(other.id, 2) is other
+    stats = store.stats()
+    assert (stats['active'], stats['users'], stats['evicted_per_user'], stats['evicted']) == (4, 2, 1, 0)
+
+
+def test_global_bound_still_applies_across_users():
+    store = LiveSessionStore(max_sessions=2, ttl=60, max_per_user=3)
+    oldest = _open(store, 1)
+    kept = [_open(store, 2), _open(store, 3)]
+
+    assert store.get(oldest.id, 1) is None
+    assert store.stats()['users'] == 2
+
+    for session in kept:
+        store.close(session.id)
+    assert store.stats()['users'] == 0
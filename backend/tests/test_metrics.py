@@ -0,0 +1,25 @@
+from conftest import register
+
+
+def test_metrics_require_a_token(client):
+    assert client.get('/api/metrics').status_code == 401
+
+
+def test_metrics_are_admin_only(backend, client, auth_headers):
+    assert client.get('/api/metrics', headers=auth_headers).status_code == 403
+
+    # Registering the admin email does not make an admin
+    squatter = register(client, username='admin', email=backend.app.config['ADMIN_EMAIL'])
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer ' + squatter['token']})
+    assert response.status_code == 403
+
+
+def test_metrics_for_the_created_admin(backend, client, monkeypatch):
+    monkeypatch.setitem(backend.app.config, 'ADMIN_EMAIL', 'root@example.com')
+    backend.create_admin_user()
+    login = client.post('/api/auth/login', json={'email': 'root@example.com', 'password': 'admin123'})
+    assert login.status_code == 200
+
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer ' + login.get_json()['token']})
+    assert response.status_code == 200
+    assert 'password_hasher' in response.get_json()
@@ -0,0 +1,109 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from utils import result_cache
+from utils.result_cache import ResultCache
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'KHOOR'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute('caesar', 'encode', '3', 'HELLO', compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats()['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['KHOOR'] * 5
+    assert len(calls) == 1
+    assert cache.get_or_compute('caesar', 'encode', '3', 'HELLO', lambda: 'not used') == 'KHOOR'
+    assert (cache.stats()['misses'], cache.stats()['hits']) == (1, 1)
+
+
+def test_waiters_get_the_leaders_error_and_nothing_is_cached():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('bad key')
+
+    errors = []
+    def call(fn):
+        try:
+            cache.get_or_compute('affine', 'encode', '2,1', 'TEXT', fn)
+        except ValueError as error:
+            errors.append(str(error))
+
+    leader = threading.Thread(target=call, args=(fail,))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call, args=(lambda: 'not used',))
+    follower.start()
+    _wait_for(lambda: cache.stats()['coalesced'] == 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert errors == ['bad key', 'bad key']
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted_to_fit():
+    entry = sys.getsizeof('x' * 100) + result_cache._ENTRY_OVERHEAD
+    cache = ResultCache(max_bytes=3 * entry)
+    for text in ('a', 'b', 'c'):
+        cache.get_or_compute('rot13', 'encode', None, text, lambda: 'x' * 100)
+    cache.get_or_compute('rot13', 'encode', None, 'a', lambda: pytest.fail('a was evicted'))
+    cache.get_or_compute('rot13', 'encode', None, 'd', lambda: 'x' * 100)
+
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['bytes']) == (3, 1, 3 * entry)
+    recomputed = []
+    cache.get_or_compute('rot13', 'encode', None, 'b', lambda: recomputed.append('b') or 'x' * 100)
+    assert recomputed == ['b']
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    cache = ResultCache(ttl=10)
+    cache.get_or_compute('atbash', 'encode', None, 'ABC', lambda: 'ZYX')
+
+    now[0] += 9
+    assert cache.get_or_compute('atbash', 'encode', None, 'ABC', lambda: 'fresh') == 'ZYX'
+    now[0] += 2
+    assert cache.get_or_compute('atbash', 'encode', None, 'ABC', lambda: 'fresh') == 'fresh'
+    assert cache.stats()['expirations'] == 1
+
+
+def test_oversized_payloads_bypass_the_cache():
+    cache = ResultCache(max_entry_bytes=1024)
+    assert cache.get_or_compute('rot13', 'encode', None, 'A' * 4096, lambda: 'N' * 4096) == 'N' * 4096
+    assert cache.get_or_compute('rot13', 'encode', None, 'A', lambda: 'N' * 4096) == 'N' * 4096
+    stats = cache.stats()
+    assert (stats['bypassed'], stats['entries']) == (1, 0)
@@ -0,0 +1,59 @@
+from conftest import drop_everything
+
+# Tables as the first release created them: no cascades, no favorites index
+BASELINE_SCHEMA = (
+    """CREATE TABLE users (
+        id INTEGER NOT NULL, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL,
+        password_hash VARCHAR(200) NOT NULL, created_at DATETIME, updated_at DATETIME,
+        PRIMARY KEY (id), UNIQUE (username), UNIQUE (email))""",
+    """CREATE TABLE cipher_history (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, cipher_type VARCHAR(50) NOT NULL,
+        operation VARCHAR(10) NOT NULL, input_text TEXT NOT NULL, output_text TEXT NOT NULL,
+        key_used VARCHAR(100), timestamp DATETIME NOT NULL,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))""",
+    """CREATE TABLE favorites (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, cipher_type VARCHAR(50) NOT NULL,
+        created_at DATETIME NOT NULL,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))""",
+    'CREATE INDEX ix_favorites_user_id ON favorites (user_id)',
+)
+
+
+def test_upgrade_baseline_db_with_duplicate_favorites(backend):
+    db = backend.db
+    with backend.app.app_context():
+        db.session.remove()
+        drop_everything(db)
+        with db.engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(
+                "INSERT INTO users (id, username, email, password_hash) VALUES (1, 'alice', 'a@example.com', 'x')"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO cipher_history (user_id, cipher_type, operation, input_text, output_text, timestamp) "
+                "VALUES (1, 'rot13', 'encode', 'hello', 'uryyb', '2024-01-01 00:00:00')"
+            )
+            for favorite_id, cipher_type in ((1, 'caesar'), (2, 'caesar'), (3, 'hex'), (4, 'caesar'), (5, 'hex')):
+                conn.exec_driver_sql(
+                    'INSERT INTO favorites (id, user_id, cipher_type, created_at) '
+                    f"VALUES ({favorite_id}, 1, '{cipher_type}', '2024-01-01 00:00:00')"
+                )
+
+        db.create_all()
+        backend.upgrade_schema()
+
+        rows = db.session.execute(db.text('SELECT id, cipher_type FROM favorites ORDER BY id')).all()
+        assert [tuple(row) for row in rows] == [(1, 'caesar'), (3, 'hex')]
+        indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('favorites')}
+        assert 'ux_favorites_user_cipher' in indexes
+        assert backend.CipherHistory.query.one().output_text == 'uryyb'
+        referenced = {
+            fk['constrained_columns'][0]: fk['referred_table']
+            for fk in db.inspect(db.engine).get_foreign_keys('cipher_history')
+        }
+        assert referenced == {'user_id': 'users', 'input_hash': 'history_blobs', 'output_hash': 'history_blobs'}
+
+        # Running it again on the upgraded schema is a no-op
+        backend.upgrade_schema()
+        db.session.remove()
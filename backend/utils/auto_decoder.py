@@ -0,0 +1,197 @@
+"""
+Best-first search for layered encodings ("magic" decode)
+
+Each search state is a string and the chain of steps that produced it. The
+steps are the keyless decoders of CIPHER_FUNCTIONS plus the Caesar/Affine
+cracker, which contributes its best-scoring keys. A step is only tried when
+the text passes a cheap charset check (binary digits, hex digits, the Base64
+alphabet, Morse symbols, or letters for the substitution ciphers), and a
+result is dropped when it is mostly unprintable or has already been seen.
+
+States are expanded in order of plausibility: English bigram likelihood for
+text that reads like language, or a fixed encoding score for text that
+still looks like binary/hex/Base64/Morse. The search stops when the queue
+is empty or the depth, node or time budget runs out.
+"""
+import hashlib
+import heapq
+import re
+import time
+from collections import Counter
+
+from utils.ciphers import CIPHER_FUNCTIONS
+from utils.cracking import crack
+from utils.language_model import letter_codes, ngram_counts, ngram_log_probs, shannon_entropy
+
+DEFAULT_MAX_DEPTH = 5
+MAX_DEPTH = 8
+DEFAULT_TIME_BUDGET = 1.5
+MAX_TIME_BUDGET = 5.0
+MAX_NODES = 400
+MAX_INPUT_LENGTH = 64 * 1024
+DEFAULT_TOP_K = 5
+# Affine keys the cracker passes on per state
+CRACK_CANDIDATES = 2
+
+# Results below these are treated as binary junk and not explored
+MIN_PRINTABLE_RATIO = 0.9
+MAX_ENTROPY_BITS = 6.5
+
+# Average log10 bigram probability given to text with no letter pairs, and
+# to text that still looks like an encoding
+NO_LETTERS_SCORE = -6.0
+ENCODED_SCORE = -3.2
+DEPTH_PENALTY = 0.05
+
+_BINARY = re.compile(r'[01]{1,8}(?:\s+[01]{1,8})*')
+_HEX = re.compile(r'(?:[0-9A-Fa-f]{2}\s*)+')
+_BASE64 = re.compile(r'[A-Za-z0-9+/]+={0,2}')
+_MORSE = re.compile(r'[.\-/]+(?:\s+[.\-/]+)*')
+_LETTER = re.compile('[A-Za-z]')
+
+# Letter substitutions compose into another affine map, so one is enough
+_SUBSTITUTIONS = {'atbash', 'rot13', 'caesar', 'affine'}
+
+
+def _looks_base64(text):
+    compact = ''.join(text.split())
+    return len(compact) % 4 == 0 and len(compact) >= 4 and _BASE64.fullmatch(compact) is not None
+
+
+_DECODERS = (
+    ('binary', lambda text: _BINARY.fullmatch(text.strip()) is not None),
+    ('hex', lambda text: _HEX.fullmatch(text.strip()) is not None),
+    ('base64', _looks_base64),
+    ('morse', lambda text: _MORSE.fullmatch(text.strip()) is not None),
+    ('rot13', lambda text: _LETTER.search(text) is not None),
+    ('atbash', lambda text: _LETTER.search(text) is not None),
+)
+
+
+def looks_encoded(text):
+    """Whether text passes the charset check of one of the structural decoders"""
+    return any(check(text) for name, check in _DECODERS[:4])
+
+
+def printable_ratio(text):
+    if not text:
+        return 0.0
+    return sum(1 for char in text if char.isprintable() or char in '\n\r\t') / len(text)
+
+
+def english_score(text):
+    """Average log10 probability of the text's letter bigrams (higher is more English)"""
+    counts = ngram_counts(letter_codes(text), 2)
+    total = sum(counts)
+    if not total:
+        return NO_LETTERS_SCORE
+    table = ngram_log_probs(2)
+    return float(sum(count * table[index] for index, count in enumerate(counts) if count)) / float(total)
+
+
+def plausibility(text):
+    """Score used both to rank results and to order the search"""
+    score = english_score(text)
+    if looks_encoded(text):
+        score = max(score, ENCODED_SCORE)
+    # Punish control characters and stray bytes
+    return score - 4 * (1 - printable_ratio(text))
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _crack_step(cipher_type, key):
+    """Describe a cracked affine key the way the cipher registry names it"""
+    if cipher_type == 'affine':
+        a, b = map(int, key.split(','))
+        if (a, b) == (1, 13):
+            return {'cipher_type': 'rot13', 'operation': 'decode'}
+        if (a, b) == (25, 25):
+            return {'cipher_type': 'atbash', 'operation': 'decode'}
+        if a == 1:
+            return {'cipher_type': 'caesar', 'operation': 'decode', 'key': b}
+    return {'cipher_type': cipher_type, 'operation': 'decode', 'key': key}
+
+
+def _expand(text, last_cipher):
+    """(step, decoded text) pairs for every decoder whose charset check passes"""
+    substituted = last_cipher in _SUBSTITUTIONS
+    for name, check in _DECODERS:
+        if substituted and name in _SUBSTITUTIONS:
+            continue
+        if not check(text):
+            continue
+        try:
+            yield {'cipher_type': name, 'operation': 'decode'}, CIPHER_FUNCTIONS[name]['decode'](text)
+        except ValueError:
+            continue
+
+    if not substituted and _LETTER.search(text):
+        for candidate in crack(text, 'affine', CRACK_CANDIDATES):
+            step = _crack_step('affine', candidate['key'])
+            if step['cipher_type'] in ('rot13', 'atbash'):
+                continue  # Tried above as keyless decoders
+            yield step, candidate['plaintext']
+
+
+def auto_decode(text, max_depth=DEFAULT_MAX_DEPTH, time_budget=DEFAULT_TIME_BUDGET, top_k=DEFAULT_TOP_K):
+    """Search decode chains for text; returns the most plausible ones and search stats"""
+    if len(text) > MAX_INPUT_LENGTH:
+        raise ValueError(f'Text is too long for auto-decode (max {MAX_INPUT_LENGTH} characters)')
+    if not text.strip():
+        raise ValueError('Text is empty')
+
+    started = time.perf_counter()
+    deadline = started + time_budget
+    seen = {_digest(text)}
+    score = plausibility(text)
+    # (-priority, order, text, chain)
+    queue = [(-score, 0, text, [])]
+    # The input itself competes too, in case it needs no decoding
+    results = [(score, 0, text, [])]
+    order = 1
+    expanded = 0
+    stopped = 'exhausted'
+
+    while queue:
+        if time.perf_counter() > deadline:
+            stopped = 'time_budget'
+            break
+        if expanded >= MAX_NODES:
+            stopped = 'node_budget'
+            break
+        _, _, current, chain = heapq.heappop(queue)
+        if len(chain) >= max_depth:
+            continue
+        expanded += 1
+
+        last_cipher = chain[-1]['cipher_type'] if chain else None
+        for step, decoded in _expand(current, last_cipher):
+            if not decoded or decoded == current:
+                continue
+            digest = _digest(decoded)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            if printable_ratio(decoded) < MIN_PRINTABLE_RATIO or shannon_entropy(Counter(decoded).values()) > MAX_ENTROPY_BITS:
+                continue
+
+            score = plausibility(decoded)
+            new_chain = chain + [step]
+            results.append((score, order, decoded, new_chain))
+            order += 1
+            heapq.heappush(queue, (-(score - DEPTH_PENALTY * len(new_chain)), order, decoded, new_chain))
+
+    best = heapq.nlargest(max(1, top_k), results, key=lambda item: (item[0], -item[1]))
+    return {
+        'candidates': [
+            {'chain': chain, 'result': decoded, 'score': round(score, 4)}
+            for score, _, decoded, chain in best
+        ],
+        'explored': expanded,
+        'visited': len(seen),
+        'stopped': stopped,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+    }
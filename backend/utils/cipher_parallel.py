@@ -0,0 +1,136 @@
+"""
+Chunked parallel execution for position-independent ciphers
+
+The substitution ciphers (Caesar, ROT13, Atbash, Affine, keyed
+substitution) and the hex, binary and Morse encoders map each character on
+its own, so a text can be cut anywhere and the pieces transformed
+independently. Vigenère only depends on
+how many letters came before a character, so each chunk starts at the key
+position given by a prefix count of letters. Morse decoding is per token and
+is cut on whitespace. Joining the chunk outputs in order reproduces the
+serial result exactly.
+"""
+import string
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ciphers import CIPHER_FUNCTIONS, _vigenere_schedule, _vigenere_transform
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+_ASCII_LETTERS = string.ascii_letters.encode('ascii')
+
+# (cipher_type, operation) -> separator between chunk outputs
+SPLITTABLE = {
+    ('caesar', 'encode'): '',
+    ('caesar', 'decode'): '',
+    ('rot13', 'encode'): '',
+    ('rot13', 'decode'): '',
+    ('atbash', 'encode'): '',
+    ('atbash', 'decode'): '',
+    ('affine', 'encode'): '',
+    ('affine', 'decode'): '',
+    ('substitution', 'encode'): '',
+    ('substitution', 'decode'): '',
+    ('vigenere', 'encode'): '',
+    ('vigenere', 'decode'): '',
+    ('hex', 'encode'): '',
+    ('binary', 'encode'): ' ',
+    ('morse', 'encode'): ' ',
+    ('morse', 'decode'): '',
+}
+
+
+def is_splittable(cipher_type, operation):
+    return (cipher_type, operation) in SPLITTABLE
+
+
+def count_letters(text):
+    """Letters that consume a Vigenère key position"""
+    if text.isascii():
+        data = text.encode('ascii')
+        return len(data) - len(data.translate(None, _ASCII_LETTERS))
+    return sum(map(str.isalpha, text))
+
+
+def split_bounds(cipher_type, operation, text, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(start, end) index pairs covering text in chunks of about chunk_size"""
+    bounds = []
+    start = 0
+    length = len(text)
+    on_whitespace = (cipher_type, operation) == ('morse', 'decode')
+    while start < length:
+        end = min(start + chunk_size, length)
+        if on_whitespace:
+            # Extend to the end of the token that straddles the cut
+            while end < length and not text[end].isspace():
+                end += 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def key_offsets(cipher_type, key, text, bounds):
+    """Vigenère key position at the start of each chunk (0 for everything else)"""
+    if cipher_type != 'vigenere':
+        return [0] * len(bounds)
+    if not key:
+        raise ValueError("Vigenère cipher requires a key")
+    period = len(_vigenere_schedule(key, 1))
+    offsets = []
+    consumed = 0
+    for start, end in bounds:
+        offsets.append(consumed)
+        consumed = (consumed + count_letters(text[start:end])) % period
+    return offsets
+
+
+def run_chunk(cipher_type, operation, key, text, offset=0):
+    """Transform one chunk as the serial function would at this position"""
+    if cipher_type == 'vigenere':
+        sign = 1 if operation == 'encode' else -1
+        return _vigenere_transform(text, key, sign, offset)[0]
+    cipher_config = CIPHER_FUNCTIONS[cipher_type]
+    func = cipher_config[operation]
+    return func(text, key) if cipher_config['requires_key'] else func(text)
+
+
+def join_chunks(cipher_type, operation, outputs):
+    return SPLITTABLE[(cipher_type, operation)].join(outputs)
+
+
+def run_serially(fn, arg_tuples):
+    """Default runner for the solvers: fn(*args) for each tuple, in this process.
+
+    Same shape as CipherPool.imap_unordered, which spreads the calls over
+    worker processes instead.
+    """
+    for args in arg_tuples:
+        yield fn(*args)
+
+
+def parallel_transform(cipher_type, operation, key, text, executor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run a splittable cipher over text chunk by chunk on an executor.
+
+    Any concurrent.futures executor works; without one a thread pool is used,
+    which only helps where the cipher releases the GIL (NumPy, bytes codecs).
+    """
+    if not is_splittable(cipher_type, operation):
+        raise ValueError(f'{cipher_type} {operation} cannot be split into chunks')
+
+    bounds = split_bounds(cipher_type, operation, text, chunk_size)
+    if len(bounds) <= 1:
+        return run_chunk(cipher_type, operation, key, text)
+    offsets = key_offsets(cipher_type, key, text, bounds)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor()
+    try:
+        futures = [
+            executor.submit(run_chunk, cipher_type, operation, key, text[start:end], offset)
+            for (start, end), offset in zip(bounds, offsets)
+        ]
+        return join_chunks(cipher_type, operation, [future.result() for future in futures])
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,222 @@
+"""
+Process-pool offload for large cipher payloads
+
+Payloads of CIPHER_OFFLOAD_THRESHOLD characters or more run in a persistent
+pool of worker processes, so a long pure-Python transform does not hold the
+GIL of the process serving every other request. Texts travel through
+shared-memory segments as UTF-8 rather than being pickled: the request
+thread writes the input segment, the worker writes its result into a
+segment of its own, and the request thread reads and unlinks both.
+
+Ciphers that utils.cipher_parallel can split are cut into chunks of
+CIPHER_POOL_CHUNK_SIZE characters that run on several workers at once.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+from utils.cipher_parallel import is_splittable, join_chunks, key_offsets, run_chunk, split_bounds
+
+
+class CipherPoolBusyError(Exception):
+    """Every pool slot is taken and none freed up within the queue timeout"""
+
+
+class CipherPoolTimeoutError(Exception):
+    """The worker did not finish within the configured timeout"""
+
+
+def _write_segment(data):
+    segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    segment.buf[:len(data)] = data
+    return segment
+
+
+def _write_chunks(text, bounds):
+    """One segment holding the chunks back to back; returns it with their byte ranges"""
+    encoded = [text[start:end].encode('utf-8', 'surrogatepass') for start, end in bounds]
+    segment = shared_memory.SharedMemory(create=True, size=max(sum(map(len, encoded)), 1))
+    ranges = []
+    position = 0
+    for data in encoded:
+        segment.buf[position:position + len(data)] = data
+        ranges.append((position, position + len(data)))
+        position += len(data)
+    return segment, ranges
+
+
+def _read_segment(name, start, end, unlink):
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        with segment.buf[start:end] as view:
+            return str(view, 'utf-8', 'surrogatepass')
+    finally:
+        segment.close()
+        if unlink:
+            segment.unlink()
+
+
+def _release_segment(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def _run_in_worker(cipher_type, operation, key, name, start, end, offset):
+    """Worker side: read a range of the input segment, run the cipher, return the result segment"""
+    text = _read_segment(name, start, end, unlink=False)
+    result = run_chunk(cipher_type, operation, key, text, offset)
+
+    data = result.encode('utf-8', 'surrogatepass')
+    segment = _write_segment(data)
+    segment.close()
+    return segment.name, len(data)
+
+
+def _discard_result(future):
+    """Clean up the result segment of a call whose caller stopped waiting"""
+    if not future.cancelled() and future.exception() is None:
+        _release_segment(future.result()[0])
+
+
+class CipherPool:
+    """Bounded front end to a lazily started ProcessPoolExecutor"""
+
+    def __init__(self, threshold, workers=None, max_pending=None, timeout=30.0, queue_timeout=0.5,
+                 chunk_size=None):
+        self.threshold = threshold
+        # Texts longer than this are split across workers where the cipher allows it
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._counters = {'offloaded': 0, 'chunks': 0, 'rejected': 0, 'timeouts': 0, 'pending': 0}
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def should_offload(self, text):
+        return self.enabled and len(text) >= self.threshold
+
+    def run(self, cipher_type, operation, key, text):
+        """Run one cipher call in worker processes and return its result"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('rejected')
+            raise CipherPoolBusyError('Cipher workers are busy, try again shortly')
+        self._count('pending')
+        try:
+            if self.chunk_size and is_splittable(cipher_type, operation) and len(text) > self.chunk_size:
+                bounds = split_bounds(cipher_type, operation, text, self.chunk_size)
+            else:
+                bounds = [(0, len(text))]
+            offsets = key_offsets(cipher_type, key, text, bounds)
+
+            segment, ranges = _write_chunks(text, bounds)
+            try:
+                executor = self._get_executor()
+                futures = [
+                    executor.submit(_run_in_worker, cipher_type, operation, key, segment.name, start, end, offset)
+                    for (start, end), offset in zip(ranges, offsets)
+                ]
+                _, not_done = wait(futures, timeout=self.timeout)
+                if not_done:
+                    # Queued chunks are dropped; running ones cannot be
+                    # interrupted, so their result segments are freed when they end
+                    self._abandon(futures)
+                    self._count('timeouts')
+                    raise CipherPoolTimeoutError('Cipher operation timed out')
+                try:
+                    results = [future.result() for future in futures]
+                except Exception:
+                    self._abandon(futures)
+                    raise
+            finally:
+                segment.close()
+                segment.unlink()
+
+            self._count('offloaded')
+            self._count('chunks', len(results))
+            outputs = [_read_segment(name, 0, size, unlink=True) for name, size in results]
+            if len(outputs) == 1:
+                return outputs[0]
+            return join_chunks(cipher_type, operation, outputs)
+        finally:
+            self._count('pending', -1)
+            self._slots.release()
+
+    def imap_unordered(self, fn, arg_tuples):
+        """Run fn(*args) for each tuple on the workers, yielding results as they finish.
+
+        The whole batch takes one pool slot and shares the pool timeout;
+        closing the generator early cancels whatever has not started.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('rejected')
+            raise CipherPoolBusyError('Cipher workers are busy, try again shortly')
+        self._count('pending')
+        futures = []
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(fn, *args) for args in arg_tuples]
+            self._count('chunks', len(futures))
+            try:
+                for future in as_completed(futures, timeout=self.timeout):
+                    yield future.result()
+            except FutureTimeoutError:
+                self._count('timeouts')
+                raise CipherPoolTimeoutError('Cipher operation timed out')
+        finally:
+            for future in futures:
+                future.cancel()
+            self._count('pending', -1)
+            self._slots.release()
+
+    @staticmethod
+    def _abandon(futures):
+        for future in futures:
+            future.cancel()
+            future.add_done_callback(_discard_result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold': self.threshold,
+                'workers': self.workers,
+                'chunk_size': self.chunk_size,
+                'max_pending': self.max_pending,
+                **self._counters,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn keeps workers independent of the server's threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(self.shutdown)
+            return self._executor
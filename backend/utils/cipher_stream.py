@@ -0,0 +1,384 @@
+"""
+Streaming (chunked) interface over the cipher algorithms
+
+Every function in CIPHER_FUNCTIONS works on one whole string. The streams
+here take the same input in pieces and emit output as they go, carrying the
+state a cipher needs across chunk boundaries (Vigenère key position, base64
+3/4-byte alignment, partial binary/Morse tokens, split UTF-8 sequences).
+Concatenating the output of ``transform()`` gives exactly what the one-shot
+function returns for the concatenated input. The one exception is hex or
+binary bytes that are valid non-ASCII UTF-8 and are followed by invalid
+ones. The one-shot decoders read all of those as Latin-1. The streams
+have already emitted the valid part as UTF-8 (see _LegacyBytesDecodeStream).
+"""
+import base64
+import codecs
+import re
+
+from utils.ciphers import (
+    CIPHER_FUNCTIONS,
+    CipherAlgorithms,
+    MORSE_DECODE,
+    _BITS_BYTE,
+    _vigenere_schedule,
+    _vigenere_transform,
+)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]+')
+
+
+class CipherStream:
+    """Incremental cipher: feed chunks with update(), then call finalize()"""
+
+    def update(self, chunk):
+        """Process one chunk and return the output that is ready"""
+        raise NotImplementedError
+
+    def finalize(self):
+        """Flush anything still buffered; the stream must not be reused"""
+        return ''
+
+    def transform(self, chunks):
+        """Generator over the output chunks for an iterable of input chunks"""
+        for chunk in chunks:
+            output = self.update(chunk)
+            if output:
+                yield output
+        tail = self.finalize()
+        if tail:
+            yield tail
+
+
+class _StatelessStream(CipherStream):
+    """Ciphers where each chunk transforms independently (substitutions, hex encode)"""
+
+    def __init__(self, func):
+        self._func = func
+
+    def update(self, chunk):
+        return self._func(chunk)
+
+
+class _JoinedStream(_StatelessStream):
+    """Stateless encoders whose tokens are space-separated (binary, Morse)"""
+
+    def __init__(self, func):
+        super().__init__(func)
+        self._started = False
+
+    def update(self, chunk):
+        output = self._func(chunk)
+        if not output:
+            return ''
+        if self._started:
+            return ' ' + output
+        self._started = True
+        return output
+
+
+class _VigenereStream(CipherStream):
+    """Carries the key position (letters consumed so far) between chunks"""
+
+    def __init__(self, key, sign):
+        if not key:
+            raise ValueError("Vigenère cipher requires a key")
+        self._key = key
+        self._sign = sign
+        self._period = len(_vigenere_schedule(key, sign))
+        self._offset = 0
+
+    def update(self, chunk):
+        output, consumed = _vigenere_transform(chunk, self._key, self._sign, self._offset)
+        self._offset = (self._offset + consumed) % self._period
+        return output
+
+
+class _Base64EncodeStream(CipherStream):
+    """Holds back the UTF-8 bytes that do not fill a 3-byte group yet"""
+
+    def __init__(self):
+        self._pending = b''
+
+    def update(self, chunk):
+        data = self._pending + chunk.encode()
+        cut = len(data) - len(data) % 3
+        self._pending = data[cut:]
+        return base64.b64encode(data[:cut]).decode()
+
+    def finalize(self):
+        output = base64.b64encode(self._pending).decode()
+        self._pending = b''
+        return output
+
+
+class _BytesDecodeStream(CipherStream):
+    """Shared UTF-8 reassembly for decoders that produce raw bytes"""
+
+    error_message = "Invalid format"
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _emit(self, data, final=False):
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError:
+            raise ValueError(self.error_message)
+
+
+class _Base64DecodeStream(_BytesDecodeStream):
+    """Decodes complete 4-character groups; the remainder waits for the next chunk"""
+
+    error_message = "Invalid Base64 format"
+
+    def __init__(self):
+        super().__init__()
+        self._pending = ''
+
+    def update(self, chunk):
+        # b64decode discards non-alphabet characters too
+        data = self._pending + _NON_BASE64.sub('', chunk)
+        cut = len(data) - len(data) % 4
+        self._pending = data[cut:]
+        try:
+            return self._emit(base64.b64decode(data[:cut]))
+        except ValueError:
+            raise ValueError(self.error_message)
+
+    def finalize(self):
+        try:
+            data = base64.b64decode(self._pending)
+        except ValueError:
+            raise ValueError(self.error_message)
+        self._pending = ''
+        return self._emit(data, final=True)
+
+
+class _LegacyBytesDecodeStream(_BytesDecodeStream):
+    """Bytes to text with ciphers._bytes_to_text's Latin-1 fallback, in bounded memory.
+
+    Bytes are decoded as UTF-8 as they arrive. From the first invalid
+    sequence on, the rest of the stream is Latin-1. That matches the one-shot
+    decoder whenever nothing before that point was non-ASCII UTF-8, which
+    covers payloads written one byte per code point. Holding everything
+    back to match the other mixed payloads exactly would take memory
+    proportional to the payload.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._latin1 = False
+
+    def _emit(self, data, final=False):
+        if self._latin1:
+            return bytes(data).decode('latin-1')
+        pending = self._decoder.getstate()[0]
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as error:
+            self._latin1 = True
+            # error.start indexes the decoder's carried bytes plus data
+            data = pending + bytes(data)
+            return data[:error.start].decode('utf-8') + data[error.start:].decode('latin-1')
+
+    def _pending_bytes(self):
+        """Bytes of an unfinished UTF-8 sequence, no longer to be decoded as UTF-8"""
+        pending = self._decoder.getstate()[0]
+        self._decoder.reset()
+        return pending
+
+
+class _HexDecodeStream(_LegacyBytesDecodeStream):
+    """Keeps an odd trailing hex digit for the next chunk"""
+
+    error_message = "Invalid hexadecimal format"
+
+    def __init__(self):
+        super().__init__()
+        self._pending = ''
+
+    def update(self, chunk):
+        data = self._pending + ''.join(chunk.split())
+        cut = len(data) - len(data) % 2
+        self._pending = data[cut:]
+        return self._emit(CipherAlgorithms.hex_decode_bytes(data[:cut]))
+
+    def finalize(self):
+        if self._pending:
+            raise ValueError(self.error_message)
+        return self._emit(b'', final=True)
+
+
+class _TokenStream(CipherStream):
+    """Whitespace-separated tokens; a token cut by the chunk boundary is held back"""
+
+    def __init__(self):
+        self._pending = ''
+
+    def _split(self, chunk):
+        text = self._pending + chunk
+        tokens = text.split()
+        if tokens and not text[-1].isspace():
+            self._pending = tokens.pop()
+        else:
+            self._pending = ''
+        return tokens
+
+    def _flush(self):
+        tokens = self._pending.split()
+        self._pending = ''
+        return tokens
+
+
+class _BinaryDecodeStream(_TokenStream, _LegacyBytesDecodeStream):
+    """binary_decode in pieces, including its one-code-point-per-group fallback.
+
+    A group above 0xFF means the payload was written one group per code
+    point; from then on (and for an unfinished UTF-8 sequence before it)
+    every group becomes chr(value).
+    """
+
+    error_message = "Invalid binary format"
+
+    def __init__(self):
+        _TokenStream.__init__(self)
+        _LegacyBytesDecodeStream.__init__(self)
+        self._code_points = False
+
+    def _decode_tokens(self, tokens, final=False):
+        try:
+            values = bytes(map(_BITS_BYTE.__getitem__, tokens))
+        except KeyError:
+            # Groups that are not exactly eight digits
+            try:
+                values = [int(token, 2) for token in tokens]
+            except ValueError:
+                raise ValueError(self.error_message)
+            if not all(0 <= value <= 0x10FFFF for value in values):
+                raise ValueError(self.error_message)
+
+        if not self._code_points and any(value > 0xFF for value in values):
+            self._code_points = True
+            # Carried bytes were one group each, so they become code points as they are
+            return self._pending_bytes().decode('latin-1') + ''.join(map(chr, values))
+        if self._code_points:
+            return ''.join(map(chr, values))
+        return self._emit(bytes(values), final)
+
+    def update(self, chunk):
+        return self._decode_tokens(self._split(chunk))
+
+    def finalize(self):
+        return self._decode_tokens(self._flush(), final=True)
+
+
+class _MorseDecodeStream(_TokenStream):
+
+    def update(self, chunk):
+        return ''.join(MORSE_DECODE.get(morse, morse) for morse in self._split(chunk))
+
+    def finalize(self):
+        return ''.join(MORSE_DECODE.get(morse, morse) for morse in self._flush())
+
+
+class _BufferedStream(CipherStream):
+    """Transpositions need the whole text; output is produced by finalize()"""
+
+    def __init__(self, func):
+        self._func = func
+        self._parts = []
+
+    def update(self, chunk):
+        self._parts.append(chunk)
+        return ''
+
+    def finalize(self):
+        text = ''.join(self._parts)
+        self._parts = []
+        return self._func(text)
+
+
+def _keyed(func, key):
+    return lambda text: func(text, key)
+
+
+_STREAM_FACTORIES = {
+    ('caesar', 'encode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.caesar_encode, key)),
+    ('caesar', 'decode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.caesar_decode, key)),
+    ('atbash', 'encode'): lambda key: _StatelessStream(CipherAlgorithms.atbash_encode),
+    ('atbash', 'decode'): lambda key: _StatelessStream(CipherAlgorithms.atbash_decode),
+    ('rot13', 'encode'): lambda key: _StatelessStream(CipherAlgorithms.rot13_encode),
+    ('rot13', 'decode'): lambda key: _StatelessStream(CipherAlgorithms.rot13_decode),
+    ('affine', 'encode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.affine_encode, key)),
+    ('affine', 'decode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.affine_decode, key)),
+    ('binary', 'encode'): lambda key: _JoinedStream(CipherAlgorithms.binary_encode),
+    ('binary', 'decode'): lambda key: _BinaryDecodeStream(),
+    ('hex', 'encode'): lambda key: _StatelessStream(CipherAlgorithms.hex_encode),
+    ('hex', 'decode'): lambda key: _HexDecodeStream(),
+    ('base64', 'encode'): lambda key: _Base64EncodeStream(),
+    ('base64', 'decode'): lambda key: _Base64DecodeStream(),
+    ('morse', 'encode'): lambda key: _JoinedStream(CipherAlgorithms.morse_encode),
+    ('morse', 'decode'): lambda key: _MorseDecodeStream(),
+    ('vigenere', 'encode'): lambda key: _VigenereStream(key, 1),
+    ('vigenere', 'decode'): lambda key: _VigenereStream(key, -1),
+    ('substitution', 'encode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.substitution_encode, key)),
+    ('substitution', 'decode'): lambda key: _StatelessStream(_keyed(CipherAlgorithms.substitution_decode, key)),
+    ('rail_fence', 'encode'): lambda key: _BufferedStream(_keyed(CipherAlgorithms.rail_fence_encode, key)),
+    ('rail_fence', 'decode'): lambda key: _BufferedStream(_keyed(CipherAlgorithms.rail_fence_decode, key)),
+}
+
+
+def open_stream(cipher_type, operation, key=None):
+    """Create a CipherStream for cipher_type/operation ('encode' or 'decode')"""
+    if cipher_type not in CIPHER_FUNCTIONS:
+        raise ValueError(f'Unsupported cipher type: {cipher_type}')
+    if operation not in ('encode', 'decode'):
+        raise ValueError(f'Unsupported operation: {operation}')
+    if CIPHER_FUNCTIONS[cipher_type]['requires_key'] and not key:
+        raise ValueError(f'{cipher_type} cipher requires a key')
+
+    factory = _STREAM_FACTORIES.get((cipher_type, operation))
+    if factory is None:
+        # Fall back to buffering for ciphers without a dedicated stream
+        func = CIPHER_FUNCTIONS[cipher_type][operation]
+        if CIPHER_FUNCTIONS[cipher_type]['requires_key']:
+            func = _keyed(func, key)
+        return _BufferedStream(func)
+    return factory(key)
+
+
+def iter_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield successive chunks read from a text file object"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def transform_file(src_path, dst_path, cipher_type, operation, key=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run a cipher over a UTF-8 file into another file with bounded memory.
+
+    Only rail fence buffers the whole text, since it is a transposition.
+    Returns the number of characters written.
+    """
+    stream = open_stream(cipher_type, operation, key)
+    written = 0
+    with open(src_path, 'r', encoding='utf-8', newline='') as src, \
+            open(dst_path, 'w', encoding='utf-8', newline='') as dst:
+        for output in stream.transform(iter_chunks(src, chunk_size)):
+            dst.write(output)
+            written += len(output)
+    return written
+
+
+def encode_file(src_path, dst_path, cipher_type, key=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encode src_path into dst_path chunk by chunk"""
+    return transform_file(src_path, dst_path, cipher_type, 'encode', key, chunk_size)
+
+
+def decode_file(src_path, dst_path, cipher_type, key=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Decode src_path into dst_path chunk by chunk"""
+    return transform_file(src_path, dst_path, cipher_type, 'decode', key, chunk_size)
@@ -1,6 +1,316 @@
 """
 Cipher algorithm implementations for the Flask backend
 """
+import binascii
+import re
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Upper bound on the number of compiled translation tables kept in memory.
+# Each table is small (a few hundred entries), so this mostly bounds growth
+# from user-supplied keys.
+TABLE_CACHE_SIZE = 512
+# Non-ASCII letters below this (Latin-1 and Latin Extended) are memoized in
+# affine tables; rarer scripts are recomputed on each lookup
+AFFINE_MEMO_LIMIT = 0x250
+
+
+MORSE_CODE = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
+    'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
+    'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
+    'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
+    'Y': '-.--', 'Z': '--..', '0': '-----', '1': '.----', '2': '..---',
+    '3': '...--', '4': '....-', '5': '.....', '6': '-....', '7': '--...',
+    '8': '---..', '9': '----.', ' ': '/'
+}
+MORSE_DECODE = {code: char for char, code in MORSE_CODE.items()}
+
+
+class _AffineTable(dict):
+    """str.translate mapping for x -> (a*x + b) mod 26 over alphabetic chars.
+
+    ASCII is compiled eagerly (both as a dict and as a bytes table for the
+    bytes.translate fast path); other letters are computed on lookup with
+    the same arithmetic the per-character loop used. Only letters below
+    AFFINE_MEMO_LIMIT are kept, so a table's size does not depend on the
+    texts it has seen. Non-letters raise LookupError, which str.translate
+    treats as "leave unchanged".
+    """
+
+    def __init__(self, a, b):
+        super().__init__()
+        self.a = a
+        self.b = b
+        for code in range(128):
+            self[code] = self._map(code)
+        self.ascii_bytes = bytes(self[code] for code in range(128)) + bytes(range(128, 256))
+
+    def _map(self, code):
+        char = chr(code)
+        if not char.isalpha():
+            return code
+        start = ord('A') if char.isupper() else ord('a')
+        return (self.a * (code - start) + self.b) % 26 + start
+
+    def __missing__(self, code):
+        if not chr(code).isalpha():
+            raise LookupError(code)
+        value = self._map(code)
+        if code < AFFINE_MEMO_LIMIT:
+            self[code] = value
+        return value
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _affine_table(a, b):
+    """Compiled table for the affine map (a, b); Caesar/ROT13/Atbash are special cases"""
+    return _AffineTable(a, b)
+
+
+def _translate(text, table):
+    """Run a compiled table over the whole text in a single C-level pass"""
+    if text.isascii():
+        return text.encode('ascii').translate(table.ascii_bytes).decode('ascii')
+    return text.translate(table)
+
+
+_BYTE_BITS = tuple(format(value, '08b') for value in range(256))
+_BITS_BYTE = {bits: value for value, bits in enumerate(_BYTE_BITS)}
+
+
+def _as_bytes(data):
+    """UTF-8 bytes of a str; bytes-like input is viewed without copying"""
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    view = memoryview(data)
+    return view if view.format == 'B' else view.cast('B')
+
+
+def _bytes_to_text(data):
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        # Payloads produced one byte per code point (Latin-1) before UTF-8
+        return data.decode('latin-1')
+
+
+def _split_tokens(text):
+    if not isinstance(text, str):
+        try:
+            text = bytes(text).decode('ascii')
+        except UnicodeDecodeError:
+            raise ValueError("Invalid binary format")
+    return text.split()
+
+
+def _binary_tokens_to_bytes(tokens):
+    try:
+        return bytes(map(_BITS_BYTE.__getitem__, tokens))
+    except KeyError:
+        pass
+    
+    try:
+        return bytes(int(token, 2) for token in tokens)
+    except ValueError:
+        raise ValueError("Invalid binary format")
+
+
+_ASCII_LETTER_RUN = re.compile(r'([A-Za-z]+)')
+
+
+class _SubstitutionTable(dict):
+    """str.translate mapping for a keyed alphabet; other characters pass through"""
+    
+    def __init__(self, mapping):
+        super().__init__(mapping)
+        self.ascii_bytes = bytes(self.get(code, code) for code in range(128)) + bytes(range(128, 256))
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _substitution_table(key, decode):
+    """Table replacing A..Z with the key's letters (or back), keeping case"""
+    alphabet = key.upper() if isinstance(key, str) else ''
+    if len(alphabet) != 26 or len(set(alphabet)) != 26 or not all('A' <= char <= 'Z' for char in alphabet):
+        raise ValueError("Substitution cipher requires a key of 26 distinct letters")
+    
+    mapping = {}
+    for index, char in enumerate(alphabet):
+        plain, cipher = ord('A') + index, ord(char)
+        source, target = (cipher, plain) if decode else (plain, cipher)
+        mapping[source] = target
+        mapping[source + 32] = target + 32
+    return _SubstitutionTable(mapping)
+
+
+def _parse_affine_key(key):
+    try:
+        a, b = map(int, key.split(','))
+    except ValueError:
+        raise ValueError("Affine cipher requires key format 'a,b'")
+    return a, b
+
+
+# Keys are user input of any length; only schedules of keys up to this many
+# characters are cached, so the cache holds at most TABLE_CACHE_SIZE short tuples
+SCHEDULE_CACHE_MAX_KEY = 256
+
+
+def _vigenere_schedule(key, sign):
+    """Per-position shifts for a Vigenère key, normalised to 0..25"""
+    if len(key) <= SCHEDULE_CACHE_MAX_KEY:
+        return _cached_vigenere_schedule(key, sign)
+    return _build_vigenere_schedule(key, sign)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _cached_vigenere_schedule(key, sign):
+    return _build_vigenere_schedule(key, sign)
+
+
+def _build_vigenere_schedule(key, sign):
+    return tuple((sign * (ord(k) - ord('A'))) % 26 for k in key.upper())
+
+
+def _vigenere_numpy(text, shifts, offset):
+    """Vectorised modular add over an ASCII text's letter positions"""
+    codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    upper = (codes >= 65) & (codes <= 90)
+    letters = np.flatnonzero(upper | ((codes >= 97) & (codes <= 122)))
+    count = letters.size
+    if not count:
+        return text, 0
+    
+    base = np.where(upper[letters], 65, 97).astype(np.int16)
+    schedule = np.asarray(shifts, dtype=np.int16)
+    key_shift = schedule[np.arange(offset, offset + count) % len(shifts)]
+    result = codes.copy()
+    result[letters] = (codes[letters] - base + key_shift) % 26 + base
+    return result.tobytes().decode('ascii'), count
+
+
+def _vigenere_transform(text, key, sign, offset=0):
+    """Vigenère over text, starting at key position ``offset``.
+
+    Only alphabetic characters consume key positions. The letter stream is
+    split into key-length residue classes; each class is a plain Caesar
+    shift, so it goes through the cached translate tables and is then
+    interleaved back into place (ASCII input takes a NumPy modular add
+    instead when NumPy is installed). Returns ``(result, letters_consumed)``.
+    """
+    if not key:
+        raise ValueError("Vigenère cipher requires a key")
+    
+    shifts = _vigenere_schedule(key, sign)
+    period = len(shifts)
+    
+    if np is not None and text.isascii():
+        return _vigenere_numpy(text, shifts, offset)
+    
+    if text.isascii():
+        # Odd indices hold the letter runs, even indices what lies between them
+        pieces = _ASCII_LETTER_RUN.split(text)
+        letters = ''.join(pieces[1::2])
+    else:
+        pieces = None
+        letters = ''.join(filter(str.isalpha, text))
+    
+    count = len(letters)
+    if not count:
+        return text, 0
+    
+    shifted = list(letters)
+    for residue in range(min(period, count)):
+        shift = shifts[(offset + residue) % period]
+        shifted[residue::period] = _translate(letters[residue::period], _affine_table(1, shift))
+    shifted = ''.join(shifted)
+    
+    if pieces is not None:
+        pos = 0
+        for i in range(1, len(pieces), 2):
+            end = pos + len(pieces[i])
+            pieces[i] = shifted[pos:end]
+            pos = end
+        return ''.join(pieces), count
+    
+    replacement = iter(shifted)
+    return ''.join(next(replacement) if char.isalpha() else char for char in text), count
+
+
+# Permutation vectors are as long as the text, so only short ones are
+# cached: at most PERMUTATION_CACHE_SIZE * PERMUTATION_CACHE_MAX_LENGTH * 4
+# bytes (8 MiB). Longer ones are rebuilt per call, in linear time.
+PERMUTATION_CACHE_SIZE = 32
+PERMUTATION_CACHE_MAX_LENGTH = 64 * 1024
+
+
+def _rail_fence_permutation(length, rails):
+    """Zigzag permutation vector: encoded[i] = text[perm[i]]"""
+    if length <= PERMUTATION_CACHE_MAX_LENGTH:
+        return _cached_rail_fence_permutation(length, rails)
+    return _build_rail_fence_permutation(length, rails)
+
+
+@lru_cache(maxsize=PERMUTATION_CACHE_SIZE)
+def _cached_rail_fence_permutation(length, rails):
+    return _build_rail_fence_permutation(length, rails)
+
+
+def _build_rail_fence_permutation(length, rails):
+    """Counting sort of the positions by rail, in a fixed number of array passes.
+
+    Position ``i`` sits on rail ``r = min(i % cycle, cycle - i % cycle)``.
+    Rails are read in order, so ``i`` lands at the start of its rail (a
+    prefix sum of the rail sizes) plus its rank on the rail: its period
+    ``k = i // cycle`` on the first and last rail, ``2k`` (down-stroke) or
+    ``2k + 1`` (up-stroke) on the others.
+    """
+    cycle = 2 * (rails - 1)
+    dtype = np.int32 if length < 2 ** 31 else np.int64
+    index = np.arange(length, dtype=dtype)
+    period, phase = np.divmod(index, cycle)
+    rail = np.minimum(phase, cycle - phase)
+    starts = np.zeros(rails, dtype=dtype)
+    np.cumsum(np.bincount(rail, minlength=rails)[:-1], out=starts[1:])
+    middle = (rail != 0) & (rail != rails - 1)
+    rank = np.where(middle, 2 * period + (phase >= rails), period)
+    perm = np.empty(length, dtype=dtype)
+    perm[starts[rail] + rank] = index
+    perm.flags.writeable = False
+    return perm
+
+
+def _utf32_codes(text):
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+
+
+def _from_utf32_codes(codes):
+    return codes.tobytes().decode('utf-32-le', 'surrogatepass')
+
+
+def _rail_fence_plan(length, rails):
+    """Closed-form zigzag permutation for (length, rails), for the pure-Python path.
+
+    Rail ``r`` holds the positions ``r, r + cycle, ...`` on the down-stroke
+    and, for middle rails, ``cycle - r, 2*cycle - r, ...`` on the up-stroke,
+    with ``cycle = 2 * (rails - 1)``. Yields one ``(down_start, up_start,
+    rail_length)`` triple per rail, applied with strided slices. Not cached:
+    the rail count is user input, so a cached plan could be arbitrarily big.
+    Callers guarantee ``1 < rails < length``.
+    """
+    cycle = 2 * (rails - 1)
+    for rail in range(rails):
+        down = len(range(rail, length, cycle))
+        if rail == 0 or rail == rails - 1:
+            yield rail, None, down
+        else:
+            up = len(range(cycle - rail, length, cycle))
+            yield rail, cycle - rail, down + up
+
 
 class CipherAlgorithms:
     """Collection of cipher algorithms"""
@@ -9,14 +319,7 @@ class CipherAlgorithms:
     def caesar_encode(text, shift):
         """Caesar cipher encoding"""
         shift = int(shift) % 26
-        result = ""
-        for char in text:
-            if char.isalpha():
-                start = ord('A') if char.isupper() else ord('a')
-                result += chr((ord(char) - start + shift) % 26 + start)
-            else:
-                result += char
-        return result
+        return _translate(text, _affine_table(1, shift))
     
     @staticmethod
     def caesar_decode(text, shift):
@@ -26,16 +329,8 @@ class CipherAlgorithms:
     @staticmethod
     def atbash_encode(text):
         """Atbash cipher encoding/decoding (symmetric)"""
-        result = ""
-        for char in text:
-            if char.isalpha():
-                if char.isupper():
-                    result += chr(ord('Z') - (ord(char) - ord('A')))
-                else:
-                    result += chr(ord('z') - (ord(char) - ord('a')))
-            else:
-                result += char
-        return result
+        # Z - x == 25x + 25 (mod 26)
+        return _translate(text, _affine_table(25, 25))
     
     @staticmethod
     def atbash_decode(text):
@@ -54,28 +349,60 @@ class CipherAlgorithms:
     
     @staticmethod
     def binary_encode(text):
-        """Binary encoding"""
-        return ' '.join(format(ord(char), '08b') for char in text)
+        """Binary encoding (8-bit groups over the UTF-8 bytes)"""
+        return ' '.join(map(_BYTE_BITS.__getitem__, _as_bytes(text)))
+    
+    @staticmethod
+    def binary_encode_bytes(text):
+        """Binary encoding returning ASCII bytes"""
+        return CipherAlgorithms.binary_encode(text).encode('ascii')
     
     @staticmethod
     def binary_decode(text):
         """Binary decoding"""
+        tokens = _split_tokens(text)
+        try:
+            return _bytes_to_text(bytes(map(_BITS_BYTE.__getitem__, tokens)))
+        except KeyError:
+            pass
+        
+        # Groups that are not exactly eight digits
         try:
-            binary_strings = text.split()
-            return ''.join(chr(int(binary, 2)) for binary in binary_strings)
+            values = [int(token, 2) for token in tokens]
+            if all(0 <= value <= 0xFF for value in values):
+                return _bytes_to_text(bytes(values))
+            # The previous encoder wrote one group per code point
+            return ''.join(map(chr, values))
         except ValueError:
             raise ValueError("Invalid binary format")
     
+    @staticmethod
+    def binary_decode_bytes(text):
+        """Binary decoding to raw bytes"""
+        return _binary_tokens_to_bytes(_split_tokens(text))
+    
     @staticmethod
     def hex_encode(text):
-        """Hexadecimal encoding"""
-        return ''.join(format(ord(char), '02X') for char in text)
+        """Hexadecimal encoding (UTF-8 bytes)"""
+        return _as_bytes(text).hex().upper()
+    
+    @staticmethod
+    def hex_encode_bytes(text):
+        """Hexadecimal encoding returning ASCII bytes"""
+        return binascii.hexlify(_as_bytes(text)).upper()
     
     @staticmethod
     def hex_decode(text):
         """Hexadecimal decoding"""
+        return _bytes_to_text(CipherAlgorithms.hex_decode_bytes(text))
+    
+    @staticmethod
+    def hex_decode_bytes(text):
+        """Hexadecimal decoding to raw bytes; whitespace between digits is ignored"""
         try:
-            return ''.join(chr(int(text[i:i+2], 16)) for i in range(0, len(text), 2))
+            if not isinstance(text, str):
+                text = bytes(text).decode('ascii')
+            return bytes.fromhex(text)
         except ValueError:
             raise ValueError("Invalid hexadecimal format")
     
@@ -97,184 +424,104 @@ class CipherAlgorithms:
     @staticmethod
     def morse_encode(text):
         """Morse code encoding"""
-        morse_dict = {
-            'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
-            'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
-            'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
-            'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
-            'Y': '-.--', 'Z': '--..', '0': '-----', '1': '.----', '2': '..---',
-            '3': '...--', '4': '....-', '5': '.....', '6': '-....', '7': '--...',
-            '8': '---..', '9': '----.', ' ': '/'
-        }
-        return ' '.join(morse_dict.get(char.upper(), char) for char in text)
+        return ' '.join(MORSE_CODE.get(char.upper(), char) for char in text)
     
     @staticmethod
     def morse_decode(text):
         """Morse code decoding"""
-        morse_dict = {
-            '.-': 'A', '-...': 'B', '-.-.': 'C', '-..': 'D', '.': 'E', '..-.': 'F',
-            '--.': 'G', '....': 'H', '..': 'I', '.---': 'J', '-.-': 'K', '.-..': 'L',
-            '--': 'M', '-.': 'N', '---': 'O', '.--.': 'P', '--.-': 'Q', '.-.': 'R',
-            '...': 'S', '-': 'T', '..-': 'U', '...-': 'V', '.--': 'W', '-..-': 'X',
-            '-.--': 'Y', '--..': 'Z', '-----': '0', '.----': '1', '..---': '2',
-            '...--': '3', '....-': '4', '.....': '5', '-....': '6', '--...': '7',
-            '---..': '8', '----.': '9', '/': ' '
-        }
-        return ''.join(morse_dict.get(morse, morse) for morse in text.split())
+        return ''.join(MORSE_DECODE.get(morse, morse) for morse in text.split())
     
     @staticmethod
     def vigenere_encode(text, key):
         """Vigenère cipher encoding"""
-        if not key:
-            raise ValueError("Vigenère cipher requires a key")
-        
-        key = key.upper()
-        result = ""
-        key_index = 0
-        
-        for char in text:
-            if char.isalpha():
-                start = ord('A') if char.isupper() else ord('a')
-                shift = ord(key[key_index % len(key)]) - ord('A')
-                result += chr((ord(char) - start + shift) % 26 + start)
-                key_index += 1
-            else:
-                result += char
-        
-        return result
+        return _vigenere_transform(text, key, 1)[0]
     
     @staticmethod
     def vigenere_decode(text, key):
         """Vigenère cipher decoding"""
-        if not key:
-            raise ValueError("Vigenère cipher requires a key")
-        
-        key = key.upper()
-        result = ""
-        key_index = 0
-        
-        for char in text:
-            if char.isalpha():
-                start = ord('A') if char.isupper() else ord('a')
-                shift = ord(key[key_index % len(key)]) - ord('A')
-                result += chr((ord(char) - start - shift + 26) % 26 + start)
-                key_index += 1
-            else:
-                result += char
-        
-        return result
+        return _vigenere_transform(text, key, -1)[0]
     
     @staticmethod
     def rail_fence_encode(text, rails):
         """Rail fence cipher encoding"""
         rails = int(rails)
-        if rails <= 1:
+        if rails <= 1 or rails >= len(text):
             return text
         
-        fence = [[] for _ in range(rails)]
-        rail = 0
-        direction = 1
+        if np is not None:
+            codes = _utf32_codes(text)
+            return _from_utf32_codes(codes[_rail_fence_permutation(len(text), rails)])
         
-        for char in text:
-            fence[rail].append(char)
-            rail += direction
-            if rail == rails - 1 or rail == 0:
-                direction = -direction
+        cycle = 2 * (rails - 1)
+        rows = []
+        for down, up, size in _rail_fence_plan(len(text), rails):
+            if up is None:
+                rows.append(text[down::cycle])
+                continue
+            # Middle rails alternate between the down- and up-stroke columns
+            row = [''] * size
+            row[0::2] = text[down::cycle]
+            row[1::2] = text[up::cycle]
+            rows.append(''.join(row))
         
-        return ''.join([''.join(row) for row in fence])
+        return ''.join(rows)
     
     @staticmethod
     def rail_fence_decode(text, rails):
         """Rail fence cipher decoding"""
         rails = int(rails)
-        if rails <= 1:
+        if rails <= 1 or rails >= len(text):
             return text
         
-        # Calculate positions
-        positions = []
-        rail = 0
-        direction = 1
+        if np is not None:
+            codes = _utf32_codes(text)
+            result = np.empty_like(codes)
+            result[_rail_fence_permutation(len(text), rails)] = codes
+            return _from_utf32_codes(result)
         
-        for i in range(len(text)):
-            positions.append(rail)
-            rail += direction
-            if rail == rails - 1 or rail == 0:
-                direction = -direction
-        
-        # Fill rails
-        fence = [[] for _ in range(rails)]
+        cycle = 2 * (rails - 1)
+        result = [''] * len(text)
         index = 0
+        for down, up, size in _rail_fence_plan(len(text), rails):
+            row = text[index:index + size]
+            index += size
+            if up is None:
+                result[down::cycle] = row
+            else:
+                result[down::cycle] = row[0::2]
+                result[up::cycle] = row[1::2]
         
-        for r in range(rails):
-            for i in range(len(positions)):
-                if positions[i] == r:
-                    fence[r].append(text[index])
-                    index += 1
-                else:
-                    fence[r].append(None)
-        
-        # Read zigzag
-        result = ""
-        rail = 0
-        direction = 1
-        rail_indexes = [0] * rails
-        
-        for i in range(len(text)):
-            result += fence[rail][rail_indexes[rail]]
-            rail_indexes[rail] += 1
-            rail += direction
-            if rail == rails - 1 or rail == 0:
-                direction = -direction
-        
-        return result
+        return ''.join(result)
     
     @staticmethod
     def affine_encode(text, key):
         """Affine cipher encoding"""
-        try:
-            a, b = map(int, key.split(','))
-        except ValueError:
-            raise ValueError("Affine cipher requires key format 'a,b'")
-        
-        result = ""
-        for char in text:
-            if char.isalpha():
-                start = ord('A') if char.isupper() else ord('a')
-                x = ord(char) - start
-                result += chr((a * x + b) % 26 + start)
-            else:
-                result += char
-        
-        return result
+        a, b = _parse_affine_key(key)
+        return _translate(text, _affine_table(a % 26, b % 26))
     
     @staticmethod
     def affine_decode(text, key):
         """Affine cipher decoding"""
-        try:
-            a, b = map(int, key.split(','))
-        except ValueError:
-            raise ValueError("Affine cipher requires key format 'a,b'")
+        a, b = _parse_affine_key(key)
         
         # Find multiplicative inverse of a modulo 26
-        a_inv = None
-        for i in range(1, 26):
-            if (a * i) % 26 == 1:
-                a_inv = i
-                break
-        
-        if a_inv is None:
+        try:
+            a_inv = pow(a, -1, 26)
+        except ValueError:
             raise ValueError("Invalid key: 'a' must be coprime to 26")
         
-        result = ""
-        for char in text:
-            if char.isalpha():
-                start = ord('A') if char.isupper() else ord('a')
-                y = ord(char) - start
-                result += chr((a_inv * (y - b + 26)) % 26 + start)
-            else:
-                result += char
-        
-        return result
+        # a_inv * (y - b) == a_inv * y - a_inv * b (mod 26)
+        return _translate(text, _affine_table(a_inv, (-a_inv * b) % 26))
+    
+    @staticmethod
+    def substitution_encode(text, key):
+        """Monoalphabetic substitution encoding (key lists the cipher letters for A..Z)"""
+        return _translate(text, _substitution_table(key, False))
+    
+    @staticmethod
+    def substitution_decode(text, key):
+        """Monoalphabetic substitution decoding"""
+        return _translate(text, _substitution_table(key, True))
 
 
 # Dictionary mapping cipher types to their functions
@@ -297,11 +544,15 @@ CIPHER_FUNCTIONS = {
     'binary': {
         'encode': CipherAlgorithms.binary_encode,
         'decode': CipherAlgorithms.binary_decode,
+        'encode_bytes': CipherAlgorithms.binary_encode_bytes,
+        'decode_bytes': CipherAlgorithms.binary_decode_bytes,
         'requires_key': False
     },
     'hex': {
         'encode': CipherAlgorithms.hex_encode,
         'decode': CipherAlgorithms.hex_decode,
+        'encode_bytes': CipherAlgorithms.hex_encode_bytes,
+        'decode_bytes': CipherAlgorithms.hex_decode_bytes,
         'requires_key': False
     },
     'base64': {
@@ -328,5 +579,10 @@ CIPHER_FUNCTIONS = {
         'encode': CipherAlgorithms.affine_encode,
         'decode': CipherAlgorithms.affine_decode,
         'requires_key': True
+    },
+    'substitution': {
+        'encode': CipherAlgorithms.substitution_encode,
+        'decode': CipherAlgorithms.substitution_decode,
+        'requires_key': True
     }
 }
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Exhaustive key search for the affine family of ciphers
+
+Caesar has 26 keys (ROT13 is shift 13) and Affine 312 (Atbash is 25,25), so
+every key is tried on every request. Decrypting with any of them is a
+permutation of the 26 letters, which means a candidate's score only depends
+on the ciphertext's letter and bigram histograms: those are counted once,
+and each key's log-likelihood is a lookup of the permuted indexes in the
+English tables. The cost is independent of the text length; only the top
+candidates are actually decrypted, with the regular cipher functions.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.ciphers import CIPHER_FUNCTIONS
+from utils.language_model import ALPHABET_SIZE, letter_codes, ngram_counts, ngram_log_probs
+
+DEFAULT_TOP_K = 5
+
+AFFINE_MULTIPLIERS = tuple(a for a in range(1, ALPHABET_SIZE) if math.gcd(a, ALPHABET_SIZE) == 1)
+
+
+def _caesar_keys():
+    # Decrypting with shift s maps y -> y - s
+    return [(shift, 1, -shift % ALPHABET_SIZE) for shift in range(ALPHABET_SIZE)]
+
+
+def _affine_keys():
+    # Decrypting with (a, b) maps y -> a^-1 * (y - b)
+    keys = []
+    for a in AFFINE_MULTIPLIERS:
+        a_inv = pow(a, -1, ALPHABET_SIZE)
+        for b in range(ALPHABET_SIZE):
+            keys.append((f'{a},{b}', a_inv, -a_inv * b % ALPHABET_SIZE))
+    return keys
+
+
+# cipher_type -> list of (key as the cipher functions take it, multiplier, offset)
+KEY_SPACES = {
+    'caesar': _caesar_keys(),
+    'affine': _affine_keys(),
+}
+
+
+def _score_keys(keys, unigrams, bigrams):
+    """Log10 likelihood of the decryption under each key"""
+    unigram_table = ngram_log_probs(1)
+    bigram_table = ngram_log_probs(2)
+
+    if np is not None:
+        multipliers = np.array([key[1] for key in keys], dtype=np.int64)[:, None]
+        offsets = np.array([key[2] for key in keys], dtype=np.int64)[:, None]
+        # perms[k, y] = plaintext letter for ciphertext letter y under key k
+        perms = (multipliers * np.arange(ALPHABET_SIZE) + offsets) % ALPHABET_SIZE
+        scores = unigram_table[perms] @ unigrams
+        present = np.flatnonzero(bigrams)
+        if present.size:
+            first, second = np.divmod(present, ALPHABET_SIZE)
+            indexes = perms[:, first] * ALPHABET_SIZE + perms[:, second]
+            scores = scores + bigram_table[indexes] @ bigrams[present]
+        return scores.tolist()
+
+    present_unigrams = [(y, count) for y, count in enumerate(unigrams) if count]
+    present_bigrams = [divmod(index, ALPHABET_SIZE) + (count,) for index, count in enumerate(bigrams) if count]
+    scores = []
+    for _, multiplier, offset in keys:
+        perm = [(multiplier * y + offset) % ALPHABET_SIZE for y in range(ALPHABET_SIZE)]
+        score = sum(count * unigram_table[perm[y]] for y, count in present_unigrams)
+        score += sum(count * bigram_table[perm[a] * ALPHABET_SIZE + perm[b]] for a, b, count in present_bigrams)
+        scores.append(score)
+    return scores
+
+
+def crack(text, cipher_type, top_k=DEFAULT_TOP_K):
+    """Rank every key of cipher_type by how English the decryption looks.
+
+    Returns up to top_k dicts with the key, its score (log10 likelihood, and
+    per letter) and the decrypted text, best first.
+    """
+    if cipher_type not in KEY_SPACES:
+        raise ValueError(f'Cracking is not supported for {cipher_type}')
+
+    codes = letter_codes(text)
+    unigrams = ngram_counts(codes, 1)
+    letters = int(sum(unigrams))
+    if not letters:
+        raise ValueError('Text contains no letters to analyze')
+    bigrams = ngram_counts(codes, 2)
+
+    keys = KEY_SPACES[cipher_type]
+    scores = _score_keys(keys, unigrams, bigrams)
+    ranked = sorted(range(len(keys)), key=scores.__getitem__, reverse=True)[:max(1, top_k)]
+
+    decode = CIPHER_FUNCTIONS[cipher_type]['decode']
+    return [
+        {
+            'key': keys[index][0],
+            'score': round(scores[index], 3),
+            'score_per_letter': round(scores[index] / letters, 4),
+            'plaintext': decode(text, keys[index][0]),
+        }
+        for index in ranked
+    ]
@@ -0,0 +1,175 @@
+"""
+Write-behind buffering for cipher history rows
+
+With HISTORY_WRITE_BEHIND enabled, history rows are queued in process and a
+background thread bulk-inserts them once HISTORY_BATCH_SIZE rows are waiting
+or the oldest has waited HISTORY_FLUSH_INTERVAL seconds. Otherwise rows are
+inserted and committed in the calling request, as before.
+
+A batch that fails (say, one row for a user deleted while it was queued) is
+retried in halves, so only the rows that fail on their own are dropped.
+"""
+import atexit
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Records history rows synchronously or through a bounded write-behind queue"""
+
+    def __init__(self, app, db, insert_rows):
+        self.app = app
+        self.db = db
+        # Adds a list of row dicts to the current session (no commit)
+        self.insert_rows = insert_rows
+        self.enabled = app.config.get('HISTORY_WRITE_BEHIND', False)
+        self.batch_size = app.config.get('HISTORY_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('HISTORY_FLUSH_INTERVAL', 0.5)
+        # How long a request waits for queue space before writing its rows itself
+        self.enqueue_timeout = app.config.get('HISTORY_ENQUEUE_TIMEOUT', 0.05)
+        self._queue = queue.Queue(maxsize=app.config.get('HISTORY_QUEUE_SIZE', 10000))
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {
+            'enqueued': 0,
+            'written': 0,
+            'failed': 0,
+            'retried_batches': 0,
+            'sync_writes': 0,
+            'backpressure_fallbacks': 0,
+            'flushes': 0,
+        }
+        self._flush_total_ms = 0.0
+        self._flush_last_ms = 0.0
+        self._flush_max_ms = 0.0
+
+    def record(self, rows):
+        """Persist history rows (dicts from CipherHistory.build_row)"""
+        if not rows:
+            return
+        if not self.enabled:
+            self._write_now(rows)
+            self._count('sync_writes', len(rows))
+            return
+
+        self._ensure_started()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                # Backpressure: the flusher is behind, so this request pays
+                # for its own remaining rows instead of growing the queue
+                remaining = rows[index:]
+                self._write_now(remaining)
+                self._count('backpressure_fallbacks', len(remaining))
+                return
+            self._count('enqueued', 1)
+
+    def flush(self):
+        """Block until every queued row has been written (or has failed)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout=10):
+        """Drain the queue and stop the flusher thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        flushes = counters['flushes']
+        return {
+            'enabled': self.enabled,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            **counters,
+            'flush_last_ms': round(self._flush_last_ms, 3),
+            'flush_avg_ms': round(self._flush_total_ms / flushes, 3) if flushes else 0.0,
+            'flush_max_ms': round(self._flush_max_ms, 3),
+        }
+
+    def _count(self, name, amount):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _write_now(self, rows):
+        """Insert rows on the caller's session and commit"""
+        self.insert_rows(rows)
+        self.db.session.commit()
+
+    def _write_rows(self, rows):
+        """Write rows in one transaction, bisecting on failure down to the bad rows"""
+        try:
+            self._write_now(rows)
+            self._count('written', len(rows))
+            return
+        except Exception as e:
+            self.db.session.rollback()
+            if len(rows) == 1:
+                self._count('failed', 1)
+                self.app.logger.warning('Dropped history row for user %s: %s', rows[0].get('user_id'), e)
+                return
+        self._count('retried_batches', 1)
+        middle = len(rows) // 2
+        self._write_rows(rows[:middle])
+        self._write_rows(rows[middle:])
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [row]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+
+            self._write_batch(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                self._write_rows(batch)
+            finally:
+                self.db.session.remove()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._counters['flushes'] += 1
+            self._flush_total_ms += elapsed_ms
+            self._flush_last_ms = elapsed_ms
+            self._flush_max_ms = max(self._flush_max_ms, elapsed_ms)
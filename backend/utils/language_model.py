@@ -0,0 +1,205 @@
+"""
+English letter statistics for scoring candidate plaintexts
+
+Letter n-gram probabilities are estimated from the wordfreq word list (the
+same source MineCipher draws its words from): every n-gram inside a word
+counts with that word's frequency. Tables are built lazily, once per
+process, as flat arrays indexed by the base-26 value of the n-gram, and hold
+log10 probabilities with a floor for unseen n-grams. Without wordfreq the
+model falls back to single-letter frequencies, treating letters as
+independent.
+
+Texts are scored over their ASCII letters only; any other character ends a
+run of letters, so n-grams never span word boundaries. Solvers that work on
+the bare letter stream use the continuous tables instead, which also count
+the n-grams spanning two adjacent words.
+"""
+import itertools
+import math
+import re
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from wordfreq import get_frequency_dict, iter_wordlist
+except ImportError:
+    get_frequency_dict = None
+
+ALPHABET_SIZE = 26
+
+# Most frequent English words used to estimate n-gram statistics
+VOCABULARY_SIZE = 50000
+
+# Relative frequencies of A..Z in English text
+ENGLISH_LETTER_FREQUENCIES = (
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015,
+    0.06094, 0.06966, 0.00153, 0.00772, 0.04025, 0.02406, 0.06749,
+    0.07507, 0.01929, 0.00095, 0.05987, 0.06327, 0.09056, 0.02758,
+    0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+)
+
+# Byte value -> letter code 0..25, or SEPARATOR for anything else
+SEPARATOR = ALPHABET_SIZE
+_CODE_TABLE = bytes(
+    (value - 65 if 65 <= value <= 90 else value - 97 if 97 <= value <= 122 else SEPARATOR)
+    for value in range(256)
+)
+
+_WORD_LETTERS = re.compile('[a-z]+')
+
+
+def letter_codes(text):
+    """Bytes of letter codes (0..25, case folded) with SEPARATOR for every other byte"""
+    if isinstance(text, str):
+        text = text.encode('utf-8', 'surrogatepass')
+    return bytes(text).translate(_CODE_TABLE)
+
+
+def letter_runs(codes):
+    """The runs of consecutive letter codes"""
+    return [run for run in codes.split(bytes([SEPARATOR])) if run]
+
+
+def ngram_index(codes):
+    """Base-26 index of a sequence of letter codes"""
+    index = 0
+    for code in codes:
+        index = index * ALPHABET_SIZE + code
+    return index
+
+
+def ngram_counts(codes, n):
+    """Flat histogram (length 26**n) of the n-grams inside each letter run"""
+    size = ALPHABET_SIZE ** n
+    if np is not None:
+        array = np.frombuffer(codes, dtype=np.uint8)
+        if array.size < n:
+            return np.zeros(size, dtype=np.int64)
+        windows = np.lib.stride_tricks.sliding_window_view(array, n)
+        windows = windows[(windows < ALPHABET_SIZE).all(axis=1)].astype(np.int64)
+        indexes = windows @ (ALPHABET_SIZE ** np.arange(n - 1, -1, -1, dtype=np.int64))
+        return np.bincount(indexes, minlength=size)
+
+    counts = [0] * size
+    for run in letter_runs(codes):
+        for start in range(len(run) - n + 1):
+            counts[ngram_index(run[start:start + n])] += 1
+    return counts
+
+
+
+def index_of_coincidence(counts):
+    """Chance that two symbols drawn from a histogram are equal"""
+    total = sum(counts)
+    if total < 2:
+        return 0.0
+    return sum(count * (count - 1) for count in counts) / (total * (total - 1))
+
+
+def shannon_entropy(counts):
+    """Bits per symbol of a histogram"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    return -sum(count / total * math.log2(count / total) for count in counts if count)
+
+def _word_weights():
+    """(word, frequency) pairs for the most common English words"""
+    frequencies = get_frequency_dict('en')
+    for word in itertools.islice(iter_wordlist('en'), VOCABULARY_SIZE):
+        yield word, frequencies.get(word, 0.0)
+
+
+def _boundary_weights(n, words):
+    """Expected counts of n-grams spanning a word boundary, with words independent"""
+    size = ALPHABET_SIZE ** n
+    counts = [0.0] * size
+    total = sum(weight for _, weight in words)
+    if not total:
+        return counts
+    for split in range(1, n):
+        # Suffixes of `split` letters followed by prefixes of `n - split`
+        suffixes = {}
+        prefixes = {}
+        for codes, weight in words:
+            if len(codes) >= split:
+                suffix = ngram_index(codes[-split:])
+                suffixes[suffix] = suffixes.get(suffix, 0.0) + weight
+            if len(codes) >= n - split:
+                prefix = ngram_index(codes[:n - split])
+                prefixes[prefix] = prefixes.get(prefix, 0.0) + weight
+        scale = ALPHABET_SIZE ** (n - split)
+        for suffix, suffix_weight in suffixes.items():
+            base = suffix * scale
+            share = suffix_weight / total
+            for prefix, prefix_weight in prefixes.items():
+                counts[base + prefix] += share * prefix_weight
+    return counts
+
+
+@lru_cache(maxsize=None)
+def ngram_log_probs(n, continuous=False):
+    """Flat table of log10 P(n-gram) for English, indexed like ngram_counts.
+
+    With continuous=True the table models text with the spaces removed.
+    """
+    size = ALPHABET_SIZE ** n
+    counts = [0.0] * size
+    if get_frequency_dict is not None:
+        words = []
+        for word, weight in _word_weights():
+            codes = [ord(char) - 97 for char in ''.join(_WORD_LETTERS.findall(word))]
+            if codes:
+                words.append((codes, weight))
+        for codes, weight in words:
+            for start in range(len(codes) - n + 1):
+                counts[ngram_index(codes[start:start + n])] += weight
+        if continuous and n > 1:
+            counts = [a + b for a, b in zip(counts, _boundary_weights(n, words))]
+
+    total = sum(counts)
+    if total:
+        floor = math.log10(min(count for count in counts if count) / total) - 1
+        table = [math.log10(count / total) if count else floor for count in counts]
+    else:
+        unigram = [math.log10(frequency) for frequency in ENGLISH_LETTER_FREQUENCIES]
+        table = [sum(letters) for letters in itertools.product(unigram, repeat=n)]
+
+    if np is not None:
+        table = np.array(table, dtype=np.float64)
+        table.flags.writeable = False
+        return table
+    return tuple(table)
+
+
+def stream_fitness(codes, n=4, table=None):
+    """Log10 likelihood of a bare letter-code sequence under the continuous model"""
+    if table is None:
+        table = ngram_log_probs(n, continuous=True)
+    if np is not None:
+        array = np.frombuffer(codes, dtype=np.uint8) if isinstance(codes, bytes) else codes
+        if array.size < n:
+            return 0.0
+        indexes = np.zeros(array.size - n + 1, dtype=np.int64)
+        for offset in range(n):
+            indexes *= ALPHABET_SIZE
+            indexes += array[offset:array.size - n + 1 + offset]
+        return float(table[indexes].sum())
+    return sum(table[ngram_index(codes[start:start + n])] for start in range(len(codes) - n + 1))
+
+
+def fitness(text, n=4):
+    """Log10 likelihood of text's letter n-grams under the English model"""
+    codes = letter_codes(text)
+    table = ngram_log_probs(n)
+    if np is not None:
+        return float(ngram_counts(codes, n) @ table)
+    return sum(
+        table[ngram_index(run[start:start + n])]
+        for run in letter_runs(codes)
+        for start in range(len(run) - n + 1)
+    )
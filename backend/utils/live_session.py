@@ -0,0 +1,271 @@
+"""
+Incremental encode sessions for live typing
+
+A session keeps the last input and output for one user's cipher settings.
+Each update diffs the new input against the previous one (common prefix and
+suffix, compared with C-level slice equality) and re-runs the cipher over
+the changed span only:
+
+- letter substitutions (Caesar, ROT13, Atbash, Affine, substitution) map
+  character i to output character i;
+- Vigenère resumes at the key position of the first changed letter, and
+  re-runs the suffix only if the edit changed the letter count by something
+  other than a multiple of the key length;
+- hex and binary encoding emit a fixed width per UTF-8 byte;
+- Base64 encoding re-runs from the last complete 3-byte group before the
+  edit.
+
+Everything else, such as the rail fence transposition, is recomputed in
+full. History is written once, when the session is committed.
+"""
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from utils.cipher_parallel import count_letters
+from utils.ciphers import _vigenere_schedule, _vigenere_transform
+
+# Longest input a session keeps; larger texts belong to /encode
+MAX_TEXT_LENGTH = 1024 * 1024
+
+_ALIGNED = {'caesar', 'rot13', 'atbash', 'affine', 'substitution'}
+# cipher_type -> (output characters per byte, separator between bytes)
+_BYTE_ENCODERS = {'hex': (2, ''), 'binary': (8, ' ')}
+
+
+def _utf8_length(text):
+    return len(text.encode('utf-8'))
+
+
+def common_affixes(old, new):
+    """Lengths of the common prefix and of the common suffix that does not overlap it"""
+    limit = min(len(old), len(new))
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, limit - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, low
+
+
+def diff_patch(old, new):
+    """Replacement {start, end, text} that turns old into new"""
+    prefix, suffix = common_affixes(old, new)
+    return {'start': prefix, 'end': len(old) - suffix, 'text': new[prefix:len(new) - suffix]}
+
+
+class LiveSession:
+    """Last input/output of one live-typing session"""
+
+    def __init__(self, session_id, user_id, cipher_type, operation, key, func):
+        self.id = session_id
+        self.user_id = user_id
+        self.cipher_type = cipher_type
+        self.operation = operation
+        self.key = key
+        # text -> result, already validated by the caller
+        self.func = func
+        self.text = ''
+        self.result = ''
+        self.updates = 0
+        self.lock = threading.Lock()
+        self._bytes = 0
+        self._letters = 0
+
+    @property
+    def strategy(self):
+        if self.cipher_type in _ALIGNED:
+            return 'aligned'
+        if self.cipher_type == 'vigenere':
+            return 'vigenere'
+        if self.operation == 'encode' and self.cipher_type in _BYTE_ENCODERS:
+            return 'bytes'
+        if self.operation == 'encode' and self.cipher_type == 'base64':
+            return 'base64'
+        return 'full'
+
+    def update(self, text):
+        """Replace the input; returns (output patch, whether it was incremental)"""
+        if len(text) > MAX_TEXT_LENGTH:
+            raise ValueError(f'Text is too long for a live session (max {MAX_TEXT_LENGTH} characters)')
+        old_text, old_result = self.text, self.result
+        strategy = self.strategy
+        incremental = strategy != 'full' and bool(old_text)
+
+        if not incremental:
+            result = self.func(text)
+            self._bytes = _utf8_length(text) if strategy in ('bytes', 'base64') else 0
+            self._letters = count_letters(text) if strategy == 'vigenere' else 0
+        else:
+            prefix, suffix = common_affixes(old_text, text)
+            if strategy == 'aligned':
+                result = self._update_aligned(text, prefix, suffix)
+            elif strategy == 'vigenere':
+                result = self._update_vigenere(text, prefix, suffix)
+            elif strategy == 'bytes':
+                result = self._update_bytes(text, prefix, suffix)
+            else:
+                result = self._update_base64(text, prefix)
+
+        self.text, self.result = text, result
+        self.updates += 1
+        return diff_patch(old_result, result), incremental
+
+    def _update_aligned(self, text, prefix, suffix):
+        old = self.result
+        middle = self.func(text[prefix:len(text) - suffix])
+        return old[:prefix] + middle + old[len(old) - suffix:]
+
+    def _update_vigenere(self, text, prefix, suffix):
+        old_text, old = self.text, self.result
+        sign = 1 if self.operation == 'encode' else -1
+        period = len(_vigenere_schedule(self.key, sign))
+        old_middle = old_text[prefix:len(old_text) - suffix]
+        old_tail = old_text[prefix:]
+
+        offset = (self._letters - count_letters(old_tail)) % period
+        middle, consumed = _vigenere_transform(text[prefix:len(text) - suffix], self.key, sign, offset)
+        delta = consumed - count_letters(old_middle)
+        self._letters += delta
+
+        if delta % period == 0:
+            tail = old[len(old) - suffix:] if suffix else ''
+        else:
+            # The suffix now starts at a different key position
+            suffix_text = text[len(text) - suffix:] if suffix else ''
+            tail = _vigenere_transform(suffix_text, self.key, sign, (offset + consumed) % period)[0]
+        return old[:prefix] + middle + tail
+
+    def _update_bytes(self, text, prefix, suffix):
+        old_text, old = self.text, self.result
+        width, separator = _BYTE_ENCODERS[self.cipher_type]
+        unit = width + len(separator)
+        suffix_text = text[len(text) - suffix:] if suffix else ''
+        prefix_bytes = self._bytes - _utf8_length(old_text[prefix:])
+        suffix_bytes = _utf8_length(suffix_text)
+        middle_text = text[prefix:len(text) - suffix]
+
+        head = old[:prefix_bytes * unit - len(separator)] if prefix_bytes else ''
+        tail = old[len(old) - (suffix_bytes * unit - len(separator)):] if suffix_bytes else ''
+        self._bytes = prefix_bytes + _utf8_length(middle_text) + suffix_bytes
+        return separator.join(part for part in (head, self.func(middle_text), tail) if part)
+
+    def _update_base64(self, text, prefix):
+        old_text, old = self.text, self.result
+        prefix_bytes = self._bytes - _utf8_length(old_text[prefix:])
+        aligned = prefix_bytes - prefix_bytes % 3
+        # Bytes of the prefix past the last complete group (at most two)
+        carry = text[max(0, prefix - 2):prefix].encode('utf-8')
+        carry = carry[len(carry) - (prefix_bytes - aligned):] if prefix_bytes > aligned else b''
+        tail = carry + text[prefix:].encode('utf-8')
+        self._bytes = aligned + len(tail)
+        return old[:aligned // 3 * 4] + base64.b64encode(tail).decode()
+
+
+class LiveSessionStore:
+    """Bounded LRU of live sessions with an idle timeout.
+
+    Besides the global bound, each user keeps at most max_per_user
+    sessions; opening one more evicts that user's least recently used
+    session, so one client cannot push everyone else's out.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=600.0, max_per_user=10):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self._sessions = OrderedDict()  # id -> (session, expires_at)
+        self._by_user = {}  # user_id -> OrderedDict of that user's session ids, LRU first
+        self._lock = threading.Lock()
+        self._counters = {
+            'created': 0,
+            'committed': 0,
+            'discarded': 0,
+            'expired': 0,
+            'evicted': 0,
+            'evicted_per_user': 0,
+            'incremental_updates': 0,
+            'full_updates': 0,
+        }
+
+    def create(self, user_id, cipher_type, operation, key, func, text=''):
+        session = LiveSession(secrets.token_urlsafe(16), user_id, cipher_type, operation, key, func)
+        if text:
+            session.update(text)
+        with self._lock:
+            self._sessions[session.id] = (session, time.monotonic() + self.ttl)
+            owned = self._by_user.setdefault(user_id, OrderedDict())
+            owned[session.id] = None
+            self._counters['created'] += 1
+            while len(owned) > self.max_per_user:
+                self._remove(next(iter(owned)))
+                self._counters['evicted_per_user'] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._remove(next(iter(self._sessions)))
+                self._counters['evicted'] += 1
+        return session
+
+    def get(self, session_id, user_id):
+        """The caller's session, refreshing its timeout, or None"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(session_id)
+                self._counters['expired'] += 1
+                return None
+            if session.user_id != user_id:
+                return None
+            self._sessions[session_id] = (session, time.monotonic() + self.ttl)
+            self._sessions.move_to_end(session_id)
+            self._by_user[user_id].move_to_end(session_id)
+            return session
+
+    def update(self, session, text):
+        with session.lock:
+            patch, incremental = session.update(text)
+            result = session.result
+        self._count('incremental_updates' if incremental else 'full_updates')
+        return patch, result
+
+    def close(self, session_id, committed=False):
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+                self._counters['committed' if committed else 'discarded'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._sessions),
+                'users': len(self._by_user),
+                'max_sessions': self.max_sessions,
+                'max_per_user': self.max_per_user,
+                **self._counters,
+            }
+
+    def _remove(self, session_id):
+        session, _ = self._sessions.pop(session_id)
+        owned = self._by_user[session.user_id]
+        del owned[session_id]
+        if not owned:
+            del self._by_user[session.user_id]
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,140 @@
+"""
+Bounded thread pool for password hashing
+
+scrypt and PBKDF2 are slow on purpose. Run on the request thread, a burst
+of logins occupies every server thread and cheap requests queue up behind
+it. Here hashing runs on a small pool of its own (hashlib releases the GIL
+while deriving keys), admission is capped at max_pending calls, and a call
+that cannot get a slot within queue_timeout fails fast with
+PasswordHasherBusyError instead of waiting. The admission cap defaults to
+half the WSGI server's threads, so hashing can never occupy all of them.
+
+Stored hashes carry their method and cost ("scrypt:32768:8:1$salt$hash").
+verify() reports when that differs from the configured method, so logins
+can transparently rehash after the cost is raised.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+
+
+class PasswordHasherBusyError(Exception):
+    """Every hashing slot is taken and none freed up within the queue timeout"""
+
+
+def _method_of(pwhash):
+    return pwhash.split('$', 1)[0]
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a bounded pool, with latency metrics"""
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, queue_timeout=2.0,
+                 server_threads=None):
+        self.method = method or DEFAULT_METHOD
+        if server_threads:
+            # Leave at least half of the request threads for everything else
+            limit = max(1, server_threads // 2)
+            max_pending = min(max_pending or limit, limit)
+        self.max_pending = max_pending or workers or min(4, os.cpu_count() or 1)
+        # More workers than admitted calls would never be busy
+        self.workers = min(workers or min(4, os.cpu_count() or 1), self.max_pending)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        # Method string with werkzeug's defaults filled in, e.g. scrypt:32768:8:1
+        self._full_method = None
+        self._lock = threading.Lock()
+        self._counters = {'hashes': 0, 'verifications': 0, 'rehashes': 0, 'rejected': 0, 'pending': 0}
+        self._timings = {'hash_ms': [0, 0.0, 0.0], 'queue_wait_ms': [0, 0.0, 0.0]}  # count, total, max
+
+    @property
+    def full_method(self):
+        if self._full_method is None:
+            self._full_method = _method_of(generate_password_hash('', self.method, salt_length=1))
+        return self._full_method
+
+    def needs_rehash(self, pwhash):
+        return _method_of(pwhash) != self.full_method
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        self._count('hashes')
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check a password; returns (matches, new hash or None).
+
+        A new hash is computed in the same job when the password matches
+        but the stored hash uses another method or cost.
+        """
+        self._count('verifications')
+        matches, new_hash = self._submit(self._verify, pwhash, password)
+        if new_hash is not None:
+            self._count('rehashes')
+        return matches, new_hash
+
+    def _verify(self, pwhash, password):
+        if not check_password_hash(pwhash, password):
+            return False, None
+        if self.needs_rehash(pwhash):
+            return True, generate_password_hash(password, self.method)
+        return True, None
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('rejected')
+            raise PasswordHasherBusyError('Too many sign-in attempts in progress, try again shortly')
+        self._count('pending')
+        submitted = time.perf_counter()
+        try:
+            return self._executor.submit(self._timed, fn, submitted, *args).result()
+        finally:
+            self._count('pending', -1)
+            self._slots.release()
+
+    def _timed(self, fn, submitted, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            self._record('queue_wait_ms', (started - submitted) * 1000)
+            self._record('hash_ms', (finished - started) * 1000)
+
+    def _record(self, name, value):
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += value
+            timing[2] = max(timing[2], value)
+
+    def stats(self):
+        with self._lock:
+            timings = {
+                name: {
+                    'count': count,
+                    'avg': round(total / count, 3) if count else 0.0,
+                    'max': round(peak, 3),
+                }
+                for name, (count, total, peak) in self._timings.items()
+            }
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                **self._counters,
+                **timings,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
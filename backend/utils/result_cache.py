@@ -0,0 +1,145 @@
+"""
+In-process LRU cache for deterministic cipher results
+
+Every cipher is a pure function of (cipher_type, operation, key, text), so
+results can be reused across requests. The cache is bounded by the memory
+its entries account for, skips payloads above a per-entry cap, optionally
+expires entries after a TTL, and coalesces concurrent identical requests so
+only one of them runs the cipher.
+"""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost (digest key, tuple, OrderedDict node)
+_ENTRY_OVERHEAD = 200
+
+
+class _Flight:
+    """A computation in progress that later identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultCache:
+    """Bounded, memory-accounted LRU with TTL and request coalescing"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=1024 * 1024, ttl=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # digest -> (result, size, expires_at)
+        self._inflight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'bypassed': 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(cipher_type, operation, key, text):
+        """Digest identifying one cipher invocation"""
+        digest = hashlib.sha256()
+        for part in (cipher_type, operation, repr(key)):
+            encoded = str(part).encode('utf-8', 'surrogatepass')
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get_or_compute(self, cipher_type, operation, key, text, compute):
+        """Return the cached result for this invocation, running compute() on a miss"""
+        if not self.enabled or sys.getsizeof(text) > self.max_entry_bytes:
+            self._count('bypassed')
+            return compute()
+
+        cache_key = self.make_key(cipher_type, operation, key, text)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                result, size, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(cache_key)
+                    self._counters['hits'] += 1
+                    return result
+                self._discard(cache_key)
+                self._counters['expirations'] += 1
+
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[cache_key] = _Flight()
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[cache_key]
+                if flight.error is None:
+                    self._store(cache_key, flight.result)
+            flight.done.set()
+        return flight.result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                **self._counters,
+            }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _store(self, cache_key, result):
+        """Insert under the lock, evicting least recently used entries to fit"""
+        size = sys.getsizeof(result) + _ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._discard(cache_key)
+        self._entries[cache_key] = (result, size, expires_at)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self._counters['evictions'] += 1
+
+    def _discard(self, cache_key):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
@@ -0,0 +1,32 @@
+"""
+Pre-encoded JSON for responses that only change on deploy
+
+The payload is serialised once, the way jsonify would (sorted keys, compact
+separators, trailing newline), and gets a strong ETag from its bytes.
+Serving it is then a header comparison and a bytes copy: a matching
+If-None-Match is answered 304 without building the body.
+"""
+import hashlib
+import json
+
+from flask import Response, request
+
+# Clients may reuse the body for a day; the ETag revalidates it after that
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+class StaticJSON:
+    """One JSON body, its ETag and caching headers"""
+
+    def __init__(self, payload, max_age=DEFAULT_MAX_AGE, private=False):
+        self.body = (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode()
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.headers = {
+            'ETag': f'"{self.etag}"',
+            'Cache-Control': f'{"private" if private else "public"}, max-age={max_age}',
+        }
+
+    def response(self):
+        if request.if_none_match.contains_weak(self.etag):
+            return Response(status=304, headers=self.headers)
+        return Response(self.body, mimetype='application/json', headers=self.headers)
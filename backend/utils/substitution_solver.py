@@ -0,0 +1,212 @@
+"""
+Key recovery for monoalphabetic substitution
+
+The ciphertext is reduced to its distinct letter quadgrams with their
+counts, and a candidate decryption (a permutation of the 26 letters) is
+scored by the English quadgram log-likelihood of the permuted quadgrams,
+looked up in the flat tables of utils.language_model. Hill-climbing swaps
+two letters of the permutation at a time: only the quadgrams containing one
+of the two cipher letters change, so each swap rescores just those rows
+against the per-row scores kept from the previous step.
+
+A climb ends in a local maximum, so solve() runs restarts (the first from a
+frequency-order guess, the rest from random keys) on any map-style runner
+and stops early once CONSENSUS restarts agree on the best key.
+"""
+import itertools
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.cipher_parallel import run_serially
+from utils.language_model import (
+    ALPHABET_SIZE,
+    ENGLISH_LETTER_FREQUENCIES,
+    letter_codes,
+    letter_runs,
+    ngram_index,
+    ngram_log_probs,
+)
+
+NGRAM = 4
+DEFAULT_RESTARTS = 24
+MAX_RESTARTS = 128
+# Restarts that must find the same best key before the search stops
+CONSENSUS = 3
+TIME_BUDGET = 20.0
+# Characters of the ciphertext the quadgram statistics are taken from
+SAMPLE_CHARS = 20000
+# Mean letters per run above which the text is taken to have no word breaks
+CONTINUOUS_RUN_LENGTH = 12
+
+_PAIRS = tuple(itertools.combinations(range(ALPHABET_SIZE), 2))
+_ENGLISH_ORDER = sorted(range(ALPHABET_SIZE), key=lambda letter: -ENGLISH_LETTER_FREQUENCIES[letter])
+
+
+def prepare(text):
+    """Distinct ciphertext quadgrams, their counts and which table to score them with"""
+    codes = letter_codes(text[:SAMPLE_CHARS])
+    runs = letter_runs(codes)
+    letters = sum(map(len, runs))
+    continuous = bool(runs) and letters / len(runs) > CONTINUOUS_RUN_LENGTH
+
+    counts = {}
+    for run in runs:
+        for start in range(len(run) - NGRAM + 1):
+            quadgram = run[start:start + NGRAM]
+            counts[quadgram] = counts.get(quadgram, 0) + 1
+    if not counts:
+        raise ValueError('Text is too short to solve')
+
+    rows = [tuple(quadgram) for quadgram in counts]
+    frequencies = [0] * ALPHABET_SIZE
+    for run in runs:
+        for code in run:
+            frequencies[code] += 1
+    return rows, list(counts.values()), frequencies, continuous
+
+
+def frequency_guess(frequencies):
+    """Decryption mapping that lines cipher letters up with English by frequency"""
+    cipher_order = sorted(range(ALPHABET_SIZE), key=lambda letter: -frequencies[letter])
+    perm = [0] * ALPHABET_SIZE
+    for cipher, plain in zip(cipher_order, _ENGLISH_ORDER):
+        perm[cipher] = plain
+    return perm
+
+
+def _climb_numpy(rows, counts, perm, rng, table):
+    rows = np.asarray(rows, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+    powers = ALPHABET_SIZE ** np.arange(NGRAM - 1, -1, -1, dtype=np.int64)
+    perm = np.asarray(perm, dtype=np.int64)
+    contains = np.stack([(rows == letter).any(axis=1) for letter in range(ALPHABET_SIZE)])
+    present = contains.any(axis=1)
+
+    row_scores = table[perm[rows] @ powers]
+    score = float(counts @ row_scores)
+    pairs = [pair for pair in _PAIRS if present[pair[0]] or present[pair[1]]]
+    improved = True
+    while improved:
+        improved = False
+        rng.shuffle(pairs)
+        for x, y in pairs:
+            affected = np.flatnonzero(contains[x] | contains[y])
+            perm[x], perm[y] = perm[y], perm[x]
+            new_scores = table[perm[rows[affected]] @ powers]
+            delta = float(counts[affected] @ (new_scores - row_scores[affected]))
+            if delta > 1e-9:
+                row_scores[affected] = new_scores
+                score += delta
+                improved = True
+            else:
+                perm[x], perm[y] = perm[y], perm[x]
+    return perm.tolist(), score
+
+
+def _climb_python(rows, counts, perm, rng, table):
+    perm = list(perm)
+    with_letter = [[] for _ in range(ALPHABET_SIZE)]
+    for index, row in enumerate(rows):
+        for letter in set(row):
+            with_letter[letter].append(index)
+
+    row_scores = [table[ngram_index([perm[code] for code in row])] for row in rows]
+    score = sum(count * row_score for count, row_score in zip(counts, row_scores))
+    pairs = [pair for pair in _PAIRS if with_letter[pair[0]] or with_letter[pair[1]]]
+    improved = True
+    while improved:
+        improved = False
+        rng.shuffle(pairs)
+        for x, y in pairs:
+            affected = set(with_letter[x]).union(with_letter[y])
+            perm[x], perm[y] = perm[y], perm[x]
+            new_scores = {index: table[ngram_index([perm[code] for code in rows[index]])] for index in affected}
+            delta = sum(counts[index] * (new_scores[index] - row_scores[index]) for index in affected)
+            if delta > 1e-9:
+                for index, new_score in new_scores.items():
+                    row_scores[index] = new_score
+                score += delta
+                improved = True
+            else:
+                perm[x], perm[y] = perm[y], perm[x]
+    return perm, score
+
+
+def climb(rows, counts, frequencies, continuous, seed):
+    """One hill-climbing restart; top-level so process pools can run it.
+
+    Seed 0 starts from the frequency guess, any other from a random key.
+    Returns (decryption mapping, score).
+    """
+    rng = random.Random(seed)
+    if seed == 0:
+        perm = frequency_guess(frequencies)
+    else:
+        perm = list(range(ALPHABET_SIZE))
+        rng.shuffle(perm)
+    table = ngram_log_probs(NGRAM, continuous)
+    if np is not None:
+        return _climb_numpy(rows, counts, perm, rng, table)
+    return _climb_python(rows, counts, perm, rng, table)
+
+
+def canonical_mapping(perm, frequencies):
+    """Give cipher letters absent from the text the unused plain letters in order.
+
+    Climbs leave those letters wherever they started, which would otherwise
+    make equally good keys look different.
+    """
+    used = {perm[cipher] for cipher in range(ALPHABET_SIZE) if frequencies[cipher]}
+    spare = iter(plain for plain in range(ALPHABET_SIZE) if plain not in used)
+    return [perm[cipher] if frequencies[cipher] else next(spare) for cipher in range(ALPHABET_SIZE)]
+
+
+def key_from_mapping(perm):
+    """Encryption key (cipher letter for each of A..Z) from a decryption mapping"""
+    key = [''] * ALPHABET_SIZE
+    for cipher, plain in enumerate(perm):
+        key[plain] = chr(ord('A') + cipher)
+    return ''.join(key)
+
+
+def solve(text, restarts=DEFAULT_RESTARTS, runner=None, time_budget=TIME_BUDGET):
+    """Yield (result, best_so_far) per finished restart until consensus or budget.
+
+    ``runner(fn, arg_tuples)`` maps the restarts, in any order; by default
+    they run one after another in this process.
+    """
+    started = time.perf_counter()
+    rows, counts, frequencies, continuous = prepare(text)
+    letters = sum(frequencies)
+
+    best = None
+    agreeing = 0
+    results = (runner or run_serially)(
+        climb, [(rows, counts, frequencies, continuous, seed) for seed in range(max(1, restarts))]
+    )
+    try:
+        for finished, (perm, score) in enumerate(results, 1):
+            result = {
+                'key': key_from_mapping(canonical_mapping(perm, frequencies)),
+                'score': round(score, 3),
+                'score_per_letter': round(score / letters, 4),
+                'restart': finished,
+            }
+            if best is None or result['score'] > best['score'] + 1e-6:
+                best, agreeing = result, 1
+            elif result['key'] == best['key']:
+                agreeing += 1
+            best['consensus'] = agreeing
+            best['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            yield result, best
+            if agreeing >= CONSENSUS or time.perf_counter() - started > time_budget:
+                return
+    finally:
+        close = getattr(results, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,154 @@
+"""
+Frequency analysis and text statistics
+
+TextStats keeps fixed-size histograms (256 byte values, 26 letters, 26**2
+bigrams, 26**3 trigrams) and updates them chunk by chunk, so a file of any
+size is analysed in constant memory. Each chunk is counted in one pass with
+numpy.bincount over its byte/letter-code array, or with collections.Counter
+when NumPy is not installed. Bigrams and trigrams only count inside runs of
+ASCII letters; the last letters of a chunk are carried over so n-grams
+spanning a chunk boundary are counted exactly once.
+"""
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.language_model import (
+    ALPHABET_SIZE,
+    ENGLISH_LETTER_FREQUENCIES,
+    SEPARATOR,
+    index_of_coincidence,
+    letter_codes,
+    ngram_counts,
+    shannon_entropy,
+)
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_NGRAM_SIZES = (2, 3)
+
+
+def _ngram_text(index, n):
+    letters = []
+    for _ in range(n):
+        index, code = divmod(index, ALPHABET_SIZE)
+        letters.append(chr(ord('A') + code))
+    return ''.join(reversed(letters))
+
+
+def _top(counts, n, limit):
+    present = [(count, index) for index, count in enumerate(counts) if count]
+    present.sort(key=lambda item: (-item[0], item[1]))
+    return [{'ngram': _ngram_text(index, n), 'count': int(count)} for count, index in present[:limit]]
+
+
+def chi_squared(counts):
+    """Chi-squared distance of a letter histogram from English letter frequencies"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    return sum(
+        (count - total * frequency) ** 2 / (total * frequency)
+        for count, frequency in zip(counts, ENGLISH_LETTER_FREQUENCIES)
+    )
+
+
+def _zeros(size):
+    if np is not None:
+        return np.zeros(size, dtype=np.int64)
+    return [0] * size
+
+
+class TextStats:
+    """Incremental histograms: feed text or bytes with update(), read result()"""
+
+    def __init__(self):
+        self._bytes = _zeros(256)
+        self._ngrams = {n: _zeros(ALPHABET_SIZE ** n) for n in _NGRAM_SIZES}
+        # Trailing letter codes of the previous chunk, per n-gram size
+        self._tails = {n: b'' for n in _NGRAM_SIZES}
+
+    def update(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8', 'surrogatepass')
+        else:
+            chunk = bytes(chunk)
+        if not chunk:
+            return self
+
+        if np is not None:
+            self._bytes += np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+        else:
+            for value, count in Counter(chunk).items():
+                self._bytes[value] += count
+
+        codes = letter_codes(chunk)
+        for n in _NGRAM_SIZES:
+            joined = self._tails[n] + codes
+            counts = ngram_counts(joined, n)
+            if np is not None:
+                self._ngrams[n] += counts
+            else:
+                self._ngrams[n] = [a + b for a, b in zip(self._ngrams[n], counts)]
+            # Only letters directly before the boundary can start a spanning n-gram
+            tail = joined[-(n - 1):]
+            self._tails[n] = tail[tail.rfind(bytes([SEPARATOR])) + 1:]
+        return self
+
+    @property
+    def byte_counts(self):
+        return [int(count) for count in self._bytes]
+
+    @property
+    def letter_counts(self):
+        counts = self.byte_counts
+        return [counts[65 + code] + counts[97 + code] for code in range(ALPHABET_SIZE)]
+
+    def result(self, top=DEFAULT_TOP):
+        byte_counts = self.byte_counts
+        letters = self.letter_counts
+        total_letters = sum(letters)
+        total_bytes = sum(byte_counts)
+        return {
+            # Every UTF-8 byte except continuation bytes starts a character
+            'characters': total_bytes - sum(byte_counts[0x80:0xC0]),
+            'bytes': total_bytes,
+            'letters': total_letters,
+            'letter_frequencies': {
+                chr(ord('A') + code): {
+                    'count': count,
+                    'frequency': round(count / total_letters, 6) if total_letters else 0.0,
+                }
+                for code, count in enumerate(letters)
+            },
+            'bigrams': _top(list(self._ngrams[2]), 2, top),
+            'trigrams': _top(list(self._ngrams[3]), 3, top),
+            'index_of_coincidence': round(index_of_coincidence(letters), 6),
+            'entropy_bits_per_byte': round(shannon_entropy(byte_counts), 6),
+            'letter_entropy_bits': round(shannon_entropy(letters), 6),
+            'chi_squared_english': round(chi_squared(letters), 4),
+        }
+
+
+def analyze(text, top=DEFAULT_TOP):
+    """Statistics for one text in a single pass"""
+    return TextStats().update(text).result(top)
+
+
+def analyze_chunks(chunks, top=DEFAULT_TOP):
+    """Statistics over an iterable of text or bytes chunks, in constant memory"""
+    stats = TextStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats.result(top)
+
+
+def analyze_file(path, top=DEFAULT_TOP, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Statistics for a file read in binary chunks"""
+    with open(path, 'rb') as handle:
+        return analyze_chunks(iter(lambda: handle.read(chunk_size), b''), top)
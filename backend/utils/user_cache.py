@@ -0,0 +1,97 @@
+"""
+Per-process cache of user records for JWT-authenticated routes
+
+The token only carries the user id, so routes that show the caller's
+profile would otherwise load the users row on every request. The cache
+keeps the to_dict() form of recently seen users in a bounded LRU with a
+TTL. Writers invalidate the entry after committing; a load that raced with
+an invalidation is returned but not stored, so a stale row cannot be
+cached after the update that replaced it. Other processes catch up within
+the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Bounded LRU of per-user dicts keyed by user id, with TTL"""
+
+    def __init__(self, max_entries=10000, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (record, expires_at)
+        # Bumped by every invalidation; loads that straddle one are not stored
+        self._version = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, user_id, load):
+        """The user's record, calling load() on a miss; None if load() finds no user"""
+        if not self.enabled:
+            return load()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                record, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self._counters['hits'] += 1
+                    return dict(record)
+                del self._entries[user_id]
+                self._counters['expirations'] += 1
+            self._counters['misses'] += 1
+            version = self._version
+
+        record = load()
+        if record is not None:
+            with self._lock:
+                if version == self._version:
+                    self._put(user_id, record)
+        return record
+
+    def store(self, user_id, record):
+        """Cache a record the caller has just committed"""
+        if self.enabled:
+            with self._lock:
+                self._version += 1
+                self._put(user_id, record)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._version += 1
+            self._counters['invalidations'] += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self._counters['hits'] / lookups, 4) if lookups else 0.0,
+                **self._counters,
+            }
+
+    def _put(self, user_id, record):
+        self._entries[user_id] = (dict(record), time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
@@ -0,0 +1,247 @@
+"""
+Key recovery for the Vigenère cipher
+
+The solver works on the key stream: the letters of the ciphertext in order,
+each of which consumed one key position when it was encrypted. It
+
+1. ranks candidate key lengths by the average index of coincidence of the
+   residue columns, backed up by Kasiski spacing of repeated trigrams;
+2. solves each column of a candidate length as a Caesar shift, picking the
+   shift whose letter distribution is closest (chi-squared) to English;
+3. refines the key by hill-climbing on the quadgram fitness of a sample of
+   the stream, changing one key letter at a time.
+
+Candidate lengths are independent, so solve() can run them on any
+map-style runner (for instance CipherPool.imap_unordered) and yields each
+result as it arrives, so callers can report the best key found so far.
+"""
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.cipher_parallel import run_serially
+from utils.language_model import (
+    ALPHABET_SIZE,
+    ENGLISH_LETTER_FREQUENCIES,
+    SEPARATOR,
+    index_of_coincidence,
+    letter_codes,
+    ngram_log_probs,
+    stream_fitness,
+)
+
+MAX_KEY_LENGTH = 20
+# Key lengths that go on to column solving and refinement
+CANDIDATE_LENGTHS = 4
+# Letters of the stream used for hill-climbing (and for Kasiski)
+REFINE_SAMPLE = 20000
+REFINE_SAMPLE_PURE_PYTHON = 2000
+KASISKI_SAMPLE = 100000
+
+ENGLISH_IOC = sum(frequency * frequency for frequency in ENGLISH_LETTER_FREQUENCIES)
+RANDOM_IOC = 1 / ALPHABET_SIZE
+
+
+def key_stream(text):
+    """Letter codes of every key-consuming character.
+
+    Non-ASCII letters also consume a key position; they are kept as
+    SEPARATOR placeholders so the columns stay aligned.
+    """
+    if text.isascii():
+        return letter_codes(text).replace(bytes([SEPARATOR]), b'')
+    return letter_codes(''.join(filter(str.isalpha, text)).encode('ascii', 'replace'))
+
+
+def _histogram(codes):
+    if np is not None:
+        array = np.frombuffer(codes, dtype=np.uint8)
+        return np.bincount(array[array < ALPHABET_SIZE], minlength=ALPHABET_SIZE).tolist()
+    counts = [0] * ALPHABET_SIZE
+    for code in codes:
+        if code < ALPHABET_SIZE:
+            counts[code] += 1
+    return counts
+
+
+def ioc_by_length(stream, max_length):
+    """Average column index of coincidence for each key length"""
+    return {
+        length: sum(index_of_coincidence(_histogram(stream[column::length])) for column in range(length)) / length
+        for length in range(1, max_length + 1)
+    }
+
+
+def kasiski_by_length(stream, max_length):
+    """Share of repeated-trigram spacings that each key length divides"""
+    sample = stream[:KASISKI_SAMPLE]
+    distances = []
+    if np is not None and len(sample) >= 3:
+        array = np.frombuffer(sample, dtype=np.uint8).astype(np.int64)
+        valid = (array[:-2] < ALPHABET_SIZE) & (array[1:-1] < ALPHABET_SIZE) & (array[2:] < ALPHABET_SIZE)
+        trigrams = (array[:-2] * ALPHABET_SIZE + array[1:-1]) * ALPHABET_SIZE + array[2:]
+        positions = np.flatnonzero(valid)
+        order = np.argsort(trigrams[positions], kind='stable')
+        ordered = trigrams[positions][order]
+        repeat = ordered[1:] == ordered[:-1]
+        distances = (positions[order][1:][repeat] - positions[order][:-1][repeat]).tolist()
+    else:
+        last_seen = {}
+        for position in range(len(sample) - 2):
+            trigram = sample[position:position + 3]
+            if SEPARATOR in trigram:
+                continue
+            if trigram in last_seen:
+                distances.append(position - last_seen[trigram])
+            last_seen[trigram] = position
+
+    if not distances:
+        return {length: 0.0 for length in range(1, max_length + 1)}
+    return {
+        length: sum(1 for distance in distances if distance % length == 0) / len(distances)
+        for length in range(1, max_length + 1)
+    }
+
+
+def rank_key_lengths(stream, max_length=MAX_KEY_LENGTH):
+    """Key lengths ordered from most to least likely, with their scores.
+
+    A length scores by how far its column IoC moved from random text towards
+    English, plus the Kasiski share it explains beyond chance (1/length).
+    Multiples of the true length score as well as the length itself, so
+    shorter lengths win close calls.
+    """
+    max_length = max(1, min(max_length, len(stream) // 2))
+    iocs = ioc_by_length(stream, max_length)
+    kasiski = kasiski_by_length(stream, max_length)
+    scores = {}
+    for length in range(1, max_length + 1):
+        ioc_score = (iocs[length] - RANDOM_IOC) / (ENGLISH_IOC - RANDOM_IOC)
+        kasiski_score = max(0.0, kasiski[length] - 1 / length) if length > 1 else 0.0
+        scores[length] = ioc_score + kasiski_score - 0.01 * length
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def solve_columns(stream, length):
+    """Best Caesar shift per column by chi-squared against English"""
+    shifts = []
+    for column in range(length):
+        counts = _histogram(stream[column::length])
+        total = sum(counts)
+        best_shift, best_chi = 0, None
+        for shift in range(ALPHABET_SIZE):
+            chi = 0.0
+            for letter, frequency in enumerate(ENGLISH_LETTER_FREQUENCIES):
+                expected = total * frequency
+                observed = counts[(letter + shift) % ALPHABET_SIZE]
+                chi += (observed - expected) ** 2 / expected if expected else 0.0
+            if best_chi is None or chi < best_chi:
+                best_shift, best_chi = shift, chi
+        shifts.append(best_shift)
+    return shifts
+
+
+def _decrypt_stream(stream, shifts):
+    length = len(shifts)
+    if np is not None:
+        array = np.frombuffer(stream, dtype=np.uint8).astype(np.int16)
+        schedule = np.resize(np.array(shifts, dtype=np.int16), array.size)
+        plain = (array - schedule) % ALPHABET_SIZE
+        # Placeholders stay out of range so they never score as letters
+        plain[array >= ALPHABET_SIZE] = SEPARATOR
+        return plain.astype(np.uint8).tobytes()
+    return bytes(
+        (code - shifts[position % length]) % ALPHABET_SIZE if code < ALPHABET_SIZE else SEPARATOR
+        for position, code in enumerate(stream)
+    )
+
+
+def _score(stream, shifts, table):
+    plain = _decrypt_stream(stream, shifts)
+    if SEPARATOR in plain:
+        return sum(stream_fitness(run, table=table) for run in plain.split(bytes([SEPARATOR])))
+    return stream_fitness(plain, table=table)
+
+
+def refine(stream, shifts, table=None):
+    """Hill-climb one key letter at a time until no change improves the fitness"""
+    if table is None:
+        table = ngram_log_probs(4, continuous=True)
+    shifts = list(shifts)
+    best = _score(stream, shifts, table)
+    improved = True
+    while improved:
+        improved = False
+        for position in range(len(shifts)):
+            original = shifts[position]
+            for shift in range(ALPHABET_SIZE):
+                if shift == original:
+                    continue
+                shifts[position] = shift
+                score = _score(stream, shifts, table)
+                if score > best:
+                    best, original, improved = score, shift, True
+            shifts[position] = original
+    return shifts, best
+
+
+def minimal_period(shifts):
+    """Collapse a key that repeats a shorter key ('KEYKEY' -> 'KEY')"""
+    for period in range(1, len(shifts)):
+        if len(shifts) % period == 0 and shifts == shifts[:period] * (len(shifts) // period):
+            return shifts[:period]
+    return shifts
+
+
+def key_text(shifts):
+    return ''.join(chr(ord('A') + shift) for shift in shifts)
+
+
+def solve_length(stream, length, sample):
+    """Full solve for one key length; top-level so process pools can run it"""
+    started = time.perf_counter()
+    shifts = solve_columns(stream, length)
+    columns_done = time.perf_counter()
+    shifts, score = refine(sample, shifts)
+    finished = time.perf_counter()
+    letters = sum(1 for code in sample if code < ALPHABET_SIZE)
+    return {
+        'key_length': length,
+        'key': key_text(minimal_period(shifts)),
+        'score': round(score, 3),
+        'score_per_letter': round(score / letters, 4) if letters else 0.0,
+        'timings_ms': {
+            'columns': round((columns_done - started) * 1000, 3),
+            'refine': round((finished - columns_done) * 1000, 3),
+        },
+    }
+
+
+def solve(text, max_key_length=MAX_KEY_LENGTH, candidates=CANDIDATE_LENGTHS, runner=None):
+    """Yield (result, best_so_far) for each candidate key length as it is solved.
+
+    ``runner(fn, arg_tuples)`` maps the per-length solve, in any order;
+    by default the lengths run one after another in this process.
+    """
+    started = time.perf_counter()
+    stream = key_stream(text)
+    if sum(_histogram(stream)) < 2:
+        raise ValueError('Text contains too few letters to analyze')
+
+    ranking = rank_key_lengths(stream, max_key_length)
+    ranking_ms = round((time.perf_counter() - started) * 1000, 3)
+    lengths = [length for length, _ in ranking[:max(1, candidates)]]
+    sample_size = REFINE_SAMPLE if np is not None else REFINE_SAMPLE_PURE_PYTHON
+    # The sample must start at key position 0
+    sample = stream[:sample_size]
+
+    best = None
+    for result in (runner or run_serially)(solve_length, [(stream, length, sample) for length in lengths]):
+        result['timings_ms']['key_lengths'] = ranking_ms
+        # Equal scores (a key and its repetitions) go to the shorter key
+        if best is None or (result['score'], -len(result['key'])) > (best['score'], -len(best['key'])):
+            best = result
+        yield result, best
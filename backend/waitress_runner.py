@@ -1,6 +1,6 @@
 from __future__ import annotations
 import sys
-from app import app
+from app import app, prepare_database
 
 def main():
     try:
@@ -9,8 +9,9 @@ def main():
         print('waitress not installed:', e)
         sys.exit(2)
 
+    prepare_database()
     print('[WAITRESS] Serving app on http://127.0.0.1:5000')
-    serve(app, host='127.0.0.1', port=5000)
+    serve(app, host='127.0.0.1', port=5000, threads=app.config['SERVER_THREADS'])
 
 if __name__ == '__main__':
     main()